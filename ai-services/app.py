@@ -5,11 +5,14 @@ from flask_limiter.util import get_remote_address
 import os
 from dotenv import load_dotenv
 import logging
+import redis
 
 # Importar serviços
 from services.recommendation_service import RecommendationService
 from services.network_analysis_service import NetworkAnalysisService
 from services.text_analysis_service import TextAnalysisService
+from services.snapshot_store import SnapshotDatabase
+from services.popularity_engine import PopularityEngine
 from utils.database import DatabaseConnection
 from utils.auth import require_api_key
 
@@ -34,10 +37,31 @@ limiter = Limiter(
 # Configurações
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
 app.config['MONGODB_URI'] = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/ci-connect')
+app.config['TEXT_FEATURIZER'] = os.getenv('TEXT_FEATURIZER', 'tfidf')  # 'tfidf' | 'hashing'
+app.config['REDIS_URL'] = os.getenv('REDIS_URL')  # Eventos de popularidade compartilhados entre workers
+# Snapshot congelado em vez do MongoDB: apenas para jobs offline e benchmarks (OFFLINE_MODE=true),
+# pois os dados não acompanham as alterações feitas depois da exportação
+app.config['SNAPSHOT_PATH'] = os.getenv('SNAPSHOT_PATH')
+app.config['OFFLINE_MODE'] = os.getenv('OFFLINE_MODE', 'false').lower() == 'true'
 
 # Inicializar serviços
-db = DatabaseConnection(app.config['MONGODB_URI'])
-recommendation_service = RecommendationService(db)
+if app.config['SNAPSHOT_PATH']:
+    if not app.config['OFFLINE_MODE']:
+        raise RuntimeError("SNAPSHOT_PATH serve dados congelados e só pode ser usado com OFFLINE_MODE=true")
+    logger.warning(f"Modo offline: servindo o snapshot {app.config['SNAPSHOT_PATH']} sem sincronização")
+    db = SnapshotDatabase.load(app.config['SNAPSHOT_PATH'])
+else:
+    db = DatabaseConnection(app.config['MONGODB_URI'])
+if app.config['REDIS_URL']:
+    redis_client = redis.from_url(app.config['REDIS_URL'])
+else:
+    redis_client = None
+    logger.warning("REDIS_URL não definido: popularidade mantida em memória; use um único worker")
+recommendation_service = RecommendationService(
+    db,
+    featurizer=app.config['TEXT_FEATURIZER'],
+    redis_client=redis_client
+)
 network_service = NetworkAnalysisService(db)
 text_service = TextAnalysisService()
 
@@ -61,7 +85,7 @@ def get_project_recommendations():
     {
         "user_id": "string",
         "limit": int (opcional, default: 10),
-        "algorithm": "content_based" | "collaborative" (opcional, default: content_based)
+        "algorithm": "content_based" | "collaborative" | "graph" (opcional, default: content_based)
     }
     """
     try:
@@ -105,7 +129,8 @@ def get_user_recommendations():
             "role": "student" | "professor" (opcional),
             "skills": ["skill1", "skill2"] (opcional),
             "interests": ["interest1", "interest2"] (opcional)
-        }
+        },
+        "algorithm": "content_based" | "graph" (opcional, default: content_based)
     }
     """
     try:
@@ -113,6 +138,7 @@ def get_user_recommendations():
         user_id = data.get('user_id')
         limit = data.get('limit', 10)
         filters = data.get('filters', {})
+        algorithm = data.get('algorithm', 'content_based')
         
         if not user_id:
             return jsonify({'error': 'user_id é obrigatório'}), 400
@@ -120,13 +146,15 @@ def get_user_recommendations():
         recommendations = recommendation_service.get_user_recommendations(
             user_id=user_id,
             limit=limit,
-            filters=filters
+            filters=filters,
+            algorithm=algorithm
         )
         
         return jsonify({
             'user_id': user_id,
             'recommendations': recommendations,
             'filters_applied': filters,
+            'algorithm_used': algorithm,
             'total_recommendations': len(recommendations)
         })
         
@@ -312,6 +340,106 @@ def get_project_trends():
         logger.error(f"Erro ao analisar tendências: {str(e)}")
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
+@app.route('/api/analytics/events', methods=['POST'])
+@limiter.limit("600 per minute")
+@require_api_key
+def record_project_events():
+    """
+    Registrar eventos de interação com projetos para o ranking de popularidade
+    
+    Produtor: o backend deve enviar um evento a cada visualização, novo seguidor
+    ou entrada de membro em um projeto (em lotes, sem bloquear a resposta).
+    
+    Body:
+    {
+        "events": [
+            {
+                "project_id": "string",
+                "event": "view" | "follow" | "join" (opcional, default: view),
+                "timestamp": float (opcional, segundos desde epoch; instantes futuros
+                             são limitados ao instante atual)
+            }
+        ]
+    }
+    """
+    try:
+        data = request.get_json()
+        events = data.get('events', [])
+        
+        if not events or not isinstance(events, list):
+            return jsonify({'error': 'events é obrigatório'}), 400
+        
+        for event in events:
+            if not isinstance(event, dict) or not event.get('project_id'):
+                return jsonify({'error': 'project_id é obrigatório em cada evento'}), 400
+            if event.get('event', 'view') not in PopularityEngine.EVENT_WEIGHTS:
+                return jsonify({'error': 'Evento inválido'}), 400
+            try:
+                PopularityEngine.normalize_timestamp(event.get('timestamp'))
+            except ValueError:
+                return jsonify({'error': 'timestamp deve ser um número em segundos desde epoch'}), 400
+        
+        # Todos os eventos são validados antes de qualquer registro;
+        # eventos de projetos inexistentes ou privados são ignorados
+        recorded = recommendation_service.record_project_events(events)
+        
+        return jsonify({'recorded_events': recorded, 'ignored_events': len(events) - recorded})
+        
+    except Exception as e:
+        logger.error(f"Erro ao registrar eventos: {str(e)}")
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
+@app.route('/api/analytics/trending-projects', methods=['GET'])
+@limiter.limit("30 per minute")
+@require_api_key
+def get_trending_projects():
+    """
+    Obter projetos em alta (popularidade com decaimento temporal)
+    
+    Query:
+        limit: int (opcional, default: 10, máximo: 100)
+    """
+    try:
+        limit = request.args.get('limit', 10, type=int)
+        max_limit = recommendation_service.popularity_engine.top_size
+        
+        if not 1 <= limit <= max_limit:
+            return jsonify({'error': f'limit deve estar entre 1 e {max_limit}'}), 400
+        
+        trending = recommendation_service.get_trending_projects(limit=limit)
+        
+        return jsonify({
+            'trending_projects': trending,
+            'total_projects': len(trending)
+        })
+        
+    except Exception as e:
+        logger.error(f"Erro ao obter projetos em alta: {str(e)}")
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
+@app.route('/api/analytics/duplicate-projects', methods=['GET'])
+@limiter.limit("5 per minute")
+@require_api_key
+def get_duplicate_projects():
+    """
+    Obter grupos de projetos quase duplicados (SimHash/LSH)
+    
+    Query:
+        limit: int (opcional, default: 50)
+    """
+    try:
+        limit = request.args.get('limit', 50, type=int)
+        clusters = recommendation_service.get_duplicate_project_clusters(limit=limit)
+        
+        return jsonify({
+            'clusters': clusters,
+            'total_clusters': len(clusters)
+        })
+        
+    except Exception as e:
+        logger.error(f"Erro ao detectar projetos duplicados: {str(e)}")
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint não encontrado'}), 404
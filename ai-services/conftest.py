@@ -0,0 +1,2 @@
+# Presença deste arquivo faz o pytest incluir ai-services/ no sys.path,
+# permitindo importar `services.*` a partir de tests/
@@ -0,0 +1,252 @@
+from collections import OrderedDict, defaultdict, deque
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class CollaborationGraph:
+    """
+    Grafo esparso de colaboração acadêmica (usuários, projetos, laboratórios e ligas)
+    Calcula Personalized PageRank por push local, visitando apenas a vizinhança
+    do nó de origem, e mantém um cache de vetores PPR dos usuários ativos.
+    A adjacência é imutável (copy-on-write): atualizações publicam uma nova
+    versão, e o push roda sobre a versão vigente sem segurar nenhum lock
+    """
+
+    def __init__(self, alpha=0.15, epsilon=1e-4, cache_size=1000):
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.cache_size = cache_size
+        # Nó -> frozenset de vizinhos; substituído por inteiro a cada atualização
+        self.adjacency = {}
+        self.project_edges = {}
+        self._version = 0
+        self._ppr_cache = OrderedDict()
+        # _lock protege apenas o cache e a troca da adjacência;
+        # _write_lock serializa as atualizações entre si
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    @staticmethod
+    def user_node(user_id):
+        return f"user:{user_id}"
+
+    @staticmethod
+    def project_node(project_id):
+        return f"project:{project_id}"
+
+    @staticmethod
+    def parse_node(node):
+        """
+        Separar um nó em (tipo, id)
+        """
+        node_type, _, node_id = node.partition(':')
+        return node_type, node_id
+
+    def neighbours(self, node):
+        """
+        Vizinhos de um nó na versão vigente do grafo (conjunto imutável)
+        """
+        return self.adjacency.get(node, frozenset())
+
+    def _project_neighbours(self, project):
+        """
+        Nós ligados a um projeto: membros, laboratório e liga acadêmica
+        """
+        neighbours = set()
+
+        for member in project.get('members', []):
+            user = member.get('user') if isinstance(member, dict) else member
+            if user:
+                neighbours.add(self.user_node(user))
+
+        if project.get('laboratory'):
+            neighbours.add(f"laboratory:{project['laboratory']}")
+
+        if project.get('academicLeague'):
+            neighbours.add(f"league:{project['academicLeague']}")
+
+        return frozenset(neighbours)
+
+    def build(self, projects):
+        """
+        Reconstruir o grafo completo a partir da lista de projetos
+        """
+        with self._write_lock:
+            adjacency = defaultdict(set)
+            project_edges = {}
+
+            for project in projects:
+                project_id = str(project['_id'])
+                neighbours = self._project_neighbours(project)
+                project_edges[project_id] = neighbours
+                node = self.project_node(project_id)
+                for neighbour in neighbours:
+                    adjacency[node].add(neighbour)
+                    adjacency[neighbour].add(node)
+
+            self.project_edges = project_edges
+            with self._lock:
+                self.adjacency = {node: frozenset(edges) for node, edges in adjacency.items()}
+                self._version += 1
+                self._ppr_cache.clear()
+
+    def update_projects(self, projects=(), removed_project_ids=()):
+        """
+        Aplicar um lote de projetos alterados e removidos, publicando uma única
+        nova versão da adjacência e invalidando apenas os vetores PPR afetados
+
+        Returns:
+            int: Número de projetos cuja vizinhança mudou
+        """
+        with self._write_lock:
+            changes = {}
+            for project_id in removed_project_ids:
+                project_id = str(project_id)
+                if project_id in self.project_edges:
+                    changes[project_id] = frozenset()
+            for project in projects:
+                project_id = str(project['_id'])
+                neighbours = self._project_neighbours(project)
+                if self.project_edges.get(project_id) != neighbours:
+                    changes[project_id] = neighbours
+
+            if not changes:
+                return 0
+
+            # Copiar apenas os conjuntos de vizinhos alterados
+            adjacency = dict(self.adjacency)
+            touched = set()
+
+            for project_id, neighbours in changes.items():
+                node = self.project_node(project_id)
+                old_neighbours = self.project_edges.get(project_id, frozenset())
+                touched.add(node)
+                touched.update(old_neighbours.symmetric_difference(neighbours))
+
+                for neighbour in old_neighbours - neighbours:
+                    remaining = adjacency[neighbour] - {node}
+                    if remaining:
+                        adjacency[neighbour] = remaining
+                    else:
+                        del adjacency[neighbour]
+                for neighbour in neighbours - old_neighbours:
+                    adjacency[neighbour] = adjacency.get(neighbour, frozenset()) | {node}
+
+                if neighbours:
+                    adjacency[node] = neighbours
+                    self.project_edges[project_id] = neighbours
+                else:
+                    adjacency.pop(node, None)
+                    self.project_edges.pop(project_id, None)
+
+            with self._lock:
+                self.adjacency = adjacency
+                self._version += 1
+                self._invalidate(touched)
+
+            return len(changes)
+
+    def update_project(self, project):
+        """
+        Atualizar as arestas de um projeto e invalidar os vetores PPR afetados
+
+        Returns:
+            bool: True se a vizinhança do projeto mudou
+        """
+        return self.update_projects([project]) > 0
+
+    def remove_project(self, project_id):
+        """
+        Remover um projeto do grafo e invalidar os vetores PPR afetados
+        """
+        self.update_projects(removed_project_ids=[project_id])
+
+    def _invalidate(self, touched_nodes):
+        """
+        Descartar vetores PPR cujo suporte inclui algum nó alterado
+        """
+        stale = [
+            source for source, (support, _) in self._ppr_cache.items()
+            if not support.isdisjoint(touched_nodes)
+        ]
+        for source in stale:
+            del self._ppr_cache[source]
+
+    def personalized_pagerank(self, source):
+        """
+        Personalized PageRank aproximado a partir de um nó (push local)
+
+        Args:
+            source (str): Nó de origem (ex.: 'user:<id>')
+
+        Returns:
+            dict: Nó -> score PPR
+        """
+        with self._lock:
+            if source in self._ppr_cache:
+                self._ppr_cache.move_to_end(source)
+                return self._ppr_cache[source][1]
+
+            adjacency = self.adjacency
+            version = self._version
+
+        if source not in adjacency:
+            return {}
+
+        estimate = defaultdict(float)
+        residual = defaultdict(float)
+        residual[source] = 1.0
+        queue = deque([source])
+
+        while queue:
+            node = queue.popleft()
+            neighbours = adjacency[node]
+            degree = len(neighbours)
+            mass = residual[node]
+
+            if mass < self.epsilon * degree:
+                continue
+
+            estimate[node] += self.alpha * mass
+            residual[node] = 0.0
+            share = (1 - self.alpha) * mass / degree
+
+            for neighbour in neighbours:
+                before = residual[neighbour]
+                residual[neighbour] = before + share
+                threshold = self.epsilon * len(adjacency[neighbour])
+                if before < threshold <= residual[neighbour]:
+                    queue.append(neighbour)
+
+        # O suporte inclui nós com resíduo: mudanças neles alteram o resultado
+        support = set(estimate) | set(residual)
+        scores = dict(estimate)
+
+        with self._lock:
+            # Se o grafo mudou durante o cálculo, o resultado vale para a versão
+            # antiga e não entra no cache
+            if self._version == version:
+                self._ppr_cache[source] = (support, scores)
+                if len(self._ppr_cache) > self.cache_size:
+                    self._ppr_cache.popitem(last=False)
+
+        return scores
+
+    def rank(self, source, node_type, exclude=None, limit=10):
+        """
+        Nós de um tipo ordenados por score PPR a partir da origem
+
+        Returns:
+            list: Lista de tuplas (id, score)
+        """
+        exclude = exclude or set()
+        ranked = []
+
+        for node, score in self.personalized_pagerank(source).items():
+            current_type, node_id = self.parse_node(node)
+            if current_type == node_type and node != source and node_id not in exclude:
+                ranked.append((node_id, score))
+
+        ranked.sort(key=lambda x: x[1], reverse=True)
+        return ranked[:limit] if limit is not None else ranked
@@ -0,0 +1,336 @@
+import numpy as np
+from collections import Counter, defaultdict
+import hashlib
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+class DuplicateDetector:
+    """
+    Detecção de projetos quase duplicados com SimHash e LSH por bandas
+    Cada projeto é indexado uma única vez; apenas pares que compartilham uma
+    banda do fingerprint são comparados, evitando a comparação de todos os pares.
+
+    Os grupos não são transitivos: cada projeto pertence ao grupo do representante
+    (o projeto indexado primeiro) do qual é quase duplicado, nunca por uma cadeia
+    de projetos parecidos. Projetos editados mantêm sua posição na ordem de
+    indexação e projetos removidos saem dos grupos
+    """
+
+    FINGERPRINT_BITS = 64
+
+    def __init__(self, max_distance=9, min_similarity=0.7, n_bands=16, band_bits=12, seed=42):
+        # Em perfis curtos do mesmo domínio (título + descrição de uma linha + tags),
+        # o SimHash de 64 bits não separa duplicados de projetos distintos: pares
+        # não relacionados chegam a 5 bits. A distância de Hamming serve apenas de
+        # filtro; a decisão usa a similaridade de Jaccard entre os conjuntos de
+        # features, que não depende do tamanho do texto (edições pontuais >= 0.75,
+        # projetos distintos <= 0.55 nos perfis de teste).
+        # Cada banda amostra band_bits posições fixas do fingerprint; com 16
+        # bandas de 12 bits, pares a 6 bits colidem com prob. ~0.997 e a 9 bits
+        # com ~0.94, enquanto pares não relacionados (~32 bits) quase nunca
+        self.max_distance = max_distance
+        self.min_similarity = min_similarity
+        self.n_bands = n_bands
+        self.band_bits = band_bits
+        rng = np.random.default_rng(seed)
+        self.band_positions = [
+            sorted(int(p) for p in rng.choice(self.FINGERPRINT_BITS, size=band_bits, replace=False))
+            for _ in range(n_bands)
+        ]
+
+        self.fingerprints = {}
+        # Hashes ordenados das features de cada projeto (~8 bytes por feature)
+        self.features = {}
+        self.buckets = defaultdict(set)
+        self._digests = {}
+        self._order = {}
+        self._next_order = 0
+        self._representative = {}
+        self._members = {}
+        self._lock = threading.Lock()
+
+    def _tokenize(self, text):
+        """
+        Extrair unigramas e bigramas de palavras com seus pesos
+        """
+        words = re.findall(r'\w+', (text or '').lower())
+        features = Counter(words)
+        features.update(' '.join(pair) for pair in zip(words, words[1:]))
+        return features
+
+    def _fingerprint(self, text):
+        """
+        Calcular o fingerprint SimHash de 64 bits e os hashes das features de um texto
+        """
+        features = self._tokenize(text)
+        if not features:
+            return 0, np.zeros(0, dtype=np.uint64)
+
+        # blake2b é estável entre processos, ao contrário de hash()
+        hashes = np.array([
+            int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+            for feature in features
+        ], dtype=np.uint64)
+        weights = np.array(list(features.values()), dtype=np.float64)
+
+        shifts = np.arange(self.FINGERPRINT_BITS, dtype=np.uint64)
+        bits = ((hashes[:, None] >> shifts) & np.uint64(1)).astype(np.float64)
+        totals = weights @ (2 * bits - 1)
+
+        fingerprint = 0
+        for position in np.flatnonzero(totals > 0):
+            fingerprint |= 1 << int(position)
+        return fingerprint, np.unique(hashes)
+
+    def simhash(self, text):
+        """
+        Calcular o fingerprint SimHash de 64 bits de um texto
+        """
+        return self._fingerprint(text)[0]
+
+    def _bands(self, fingerprint):
+        bands = []
+        for band, positions in enumerate(self.band_positions):
+            key = 0
+            for position in positions:
+                key = (key << 1) | ((fingerprint >> position) & 1)
+            bands.append((band, key))
+        return bands
+
+    @staticmethod
+    def hamming_distance(fingerprint1, fingerprint2):
+        return bin(fingerprint1 ^ fingerprint2).count('1')
+
+    @staticmethod
+    def jaccard_similarity(features1, features2):
+        if len(features1) == 0 and len(features2) == 0:
+            return 1.0
+        intersection = len(np.intersect1d(features1, features2, assume_unique=True))
+        return intersection / (len(features1) + len(features2) - intersection)
+
+    def _similarity(self, project_id1, project_id2):
+        """
+        Similaridade entre dois projetos indexados, ou None se não forem duplicados
+        """
+        distance = self.hamming_distance(self.fingerprints[project_id1], self.fingerprints[project_id2])
+        if distance > self.max_distance:
+            return None
+
+        similarity = self.jaccard_similarity(self.features[project_id1], self.features[project_id2])
+        return similarity if similarity >= self.min_similarity else None
+
+    def _assign(self, project_id):
+        """
+        Colocar o projeto no grupo do representante anterior mais similar, ou
+        torná-lo representante de um novo grupo
+        """
+        order = self._order[project_id]
+        candidates = set()
+        for band in self._bands(self.fingerprints[project_id]):
+            candidates.update(self.buckets.get(band, ()))
+
+        best = None
+        for candidate in candidates:
+            # Apenas representantes indexados antes podem receber o projeto
+            if self._representative.get(candidate) != candidate or self._order[candidate] >= order:
+                continue
+
+            similarity = self._similarity(project_id, candidate)
+            if similarity is not None:
+                key = (-similarity, self._order[candidate])
+                if best is None or key < best[0]:
+                    best = (key, candidate)
+
+        root = best[1] if best else project_id
+        self._representative[project_id] = root
+        self._members.setdefault(root, set()).add(project_id)
+
+    def _unassign(self, project_id):
+        root = self._representative.pop(project_id, None)
+        if root is None:
+            return
+
+        members = self._members.get(root)
+        members.discard(project_id)
+        if not members:
+            del self._members[root]
+
+    def _reassign_from(self, start_order):
+        """
+        Refazer os grupos dos projetos a partir de uma posição da ordem de indexação
+        O agrupamento de um projeto depende apenas dos projetos indexados antes
+        dele, então projetos novos custam O(candidatos) e edições/remoções de
+        projetos antigos reprocessam os projetos posteriores
+        """
+        affected = sorted(
+            (project_id for project_id, order in self._order.items() if order >= start_order),
+            key=self._order.get
+        )
+        for project_id in affected:
+            self._unassign(project_id)
+        for project_id in affected:
+            self._assign(project_id)
+
+    def _unindex(self, project_id):
+        fingerprint = self.fingerprints.pop(project_id)
+        for band in self._bands(fingerprint):
+            self.buckets[band].discard(project_id)
+            if not self.buckets[band]:
+                del self.buckets[band]
+
+        del self.features[project_id]
+        del self._digests[project_id]
+        self._unassign(project_id)
+
+    def _index(self, project_id, digest, fingerprint, features):
+        """
+        Indexar um projeto novo ou editado
+
+        Returns:
+            int: Posição a partir da qual os grupos devem ser refeitos, ou None
+        """
+        if project_id in self._digests:
+            if self._digests[project_id] == digest:
+                return None
+            # O projeto editado mantém sua posição, e portanto seu papel de representante
+            self._unindex(project_id)
+        else:
+            self._order[project_id] = self._next_order
+            self._next_order += 1
+
+        self.fingerprints[project_id] = fingerprint
+        self.features[project_id] = features
+        self._digests[project_id] = digest
+        for band in self._bands(fingerprint):
+            self.buckets[band].add(project_id)
+
+        return self._order[project_id]
+
+    @staticmethod
+    def _digest(text):
+        return hashlib.blake2b((text or '').encode('utf-8'), digest_size=16).digest()
+
+    def add_many(self, documents):
+        """
+        Indexar (ou reindexar, se o texto mudou) um lote de pares (project_id, texto),
+        refazendo os grupos uma única vez
+        """
+        documents = [(str(project_id), text, self._digest(text)) for project_id, text in documents]
+
+        with self._lock:
+            pending = [
+                (project_id, text, digest) for project_id, text, digest in documents
+                if self._digests.get(project_id) != digest
+            ]
+
+        # Fingerprints calculados fora do lock
+        fingerprinted = [
+            (project_id, digest) + self._fingerprint(text)
+            for project_id, text, digest in pending
+        ]
+
+        with self._lock:
+            start_order = None
+            for project_id, digest, fingerprint, features in fingerprinted:
+                order = self._index(project_id, digest, fingerprint, features)
+                if order is not None and (start_order is None or order < start_order):
+                    start_order = order
+
+            if start_order is not None:
+                self._reassign_from(start_order)
+
+    def add(self, project_id, text):
+        """
+        Indexar (ou reindexar, se o texto mudou) um projeto e agrupá-lo com
+        seus quase duplicados
+
+        Returns:
+            list: IDs dos demais projetos do seu grupo de duplicados
+        """
+        project_id = str(project_id)
+        self.add_many([(project_id, text)])
+
+        with self._lock:
+            root = self._representative[project_id]
+            return sorted(self._members[root] - {project_id})
+
+    def update(self, project_id, text):
+        """
+        Reindexar um projeto editado (equivalente a add)
+        """
+        return self.add(project_id, text)
+
+    def remove_many(self, project_ids):
+        """
+        Remover projetos do índice, refazendo uma única vez os grupos que dependiam deles
+        """
+        with self._lock:
+            start_order = None
+            for project_id in map(str, project_ids):
+                if project_id not in self.fingerprints:
+                    continue
+
+                self._unindex(project_id)
+                order = self._order.pop(project_id)
+                if start_order is None or order < start_order:
+                    start_order = order
+
+            if start_order is not None:
+                self._reassign_from(start_order)
+
+    def remove(self, project_id):
+        """
+        Remover um projeto do índice, refazendo os grupos que dependiam dele
+        """
+        self.remove_many([project_id])
+
+    def project_ids(self):
+        with self._lock:
+            return set(self.fingerprints)
+
+    def __contains__(self, project_id):
+        return str(project_id) in self.fingerprints
+
+    def canonical(self, project_id):
+        """
+        Representante do grupo de duplicados ao qual o projeto pertence
+        """
+        project_id = str(project_id)
+        with self._lock:
+            return self._representative.get(project_id, project_id)
+
+    def clusters(self):
+        """
+        Grupos de projetos quase duplicados (apenas grupos com 2+ projetos)
+
+        Returns:
+            list: Lista de listas de IDs, cada uma iniciada pelo representante
+        """
+        with self._lock:
+            clusters = [
+                [root] + sorted(members - {root})
+                for root, members in self._members.items()
+                if len(members) > 1
+            ]
+
+        clusters.sort(key=len, reverse=True)
+        return clusters
+
+    def filter_duplicates(self, items, key='project_id'):
+        """
+        Manter apenas o primeiro item de cada grupo de duplicados,
+        preservando a ordem (ex.: recomendações já ordenadas por score)
+        """
+        seen = set()
+        filtered = []
+
+        for item in items:
+            root = self.canonical(item[key])
+            if root not in seen:
+                seen.add(root)
+                filtered.append(item)
+
+        return filtered
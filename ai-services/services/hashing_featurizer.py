@@ -0,0 +1,226 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class HashingFeaturizer:
+    """
+    Vetorizador TF-IDF sem vocabulário baseado em feature hashing
+    Mantém contagens de frequência de documentos em um vetor de tamanho fixo,
+    atualizadas em lotes, de modo que projetos podem ser vetorizados de forma
+    independente e consistente entre workers sem estado de ajuste compartilhado.
+
+    Documentos identificados guardam também seu vetor TF esparso (índices int32 e
+    contagens float32, ~8 bytes por termo distinto), de modo que só textos novos
+    ou editados são vetorizados e o IDF é aplicado no momento da consulta. Esse
+    custo cresce com o corpus, mas é o mesmo de manter a matriz de projetos em
+    cache; o estado de DF continua com tamanho fixo (n_features)
+    """
+
+    def __init__(self, n_features=2 ** 18, ngram_range=(1, 2), stop_words='english'):
+        self.n_features = n_features
+        self.hashing_vectorizer = HashingVectorizer(
+            n_features=n_features,
+            stop_words=stop_words,
+            lowercase=True,
+            ngram_range=ngram_range,
+            alternate_sign=False,
+            norm=None
+        )
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self.n_documents = 0
+        # ID -> (digest do texto, índices das features, contagens TF)
+        self._documents = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(text):
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+    def _term_frequencies(self, texts):
+        # Cada linha da matriz CSR possui índices únicos
+        counts = self.hashing_vectorizer.transform(texts)
+        counts.sort_indices()
+        return [
+            (
+                counts.indices[counts.indptr[row]:counts.indptr[row + 1]].astype(np.int32),
+                counts.data[counts.indptr[row]:counts.indptr[row + 1]].astype(np.float32)
+            )
+            for row in range(counts.shape[0])
+        ]
+
+    def _add_document(self, document_id, digest, indices, counts):
+        previous = self._documents.get(document_id)
+        if previous is not None:
+            if previous[0] == digest:
+                return
+            self._subtract(previous[1])
+
+        self._documents[document_id] = (digest, indices, counts)
+        np.add.at(self.document_frequency, indices, 1)
+        self.n_documents += 1
+
+    def _subtract(self, indices):
+        np.subtract.at(self.document_frequency, indices, 1)
+        self.n_documents -= 1
+
+    def partial_fit(self, texts, document_ids=None):
+        """
+        Atualizar as contagens de frequência de documentos com um lote de textos
+
+        Args:
+            texts (list): Textos do lote
+            document_ids (list): IDs dos documentos (opcional); documentos já
+                contabilizados com o mesmo texto são ignorados e documentos
+                editados têm suas contagens antigas substituídas
+
+        Returns:
+            HashingFeaturizer: A própria instância
+        """
+        texts = list(texts)
+
+        if document_ids is None:
+            if texts:
+                batch_frequency = np.bincount(
+                    self.hashing_vectorizer.transform(texts).indices,
+                    minlength=self.n_features
+                )
+                with self._lock:
+                    self.document_frequency += batch_frequency
+                    self.n_documents += len(texts)
+            return self
+
+        document_ids = [str(doc_id) for doc_id in document_ids]
+        digests = [self._digest(text) for text in texts]
+
+        # Pré-filtro sem bloquear a vetorização; a decisão final é tomada sob o lock
+        with self._lock:
+            pending = [
+                i for i, doc_id in enumerate(document_ids)
+                if self._documents.get(doc_id, (None,))[0] != digests[i]
+            ]
+
+        if not pending:
+            return self
+
+        frequencies = self._term_frequencies([texts[i] for i in pending])
+
+        with self._lock:
+            for i, (indices, counts) in zip(pending, frequencies):
+                self._add_document(document_ids[i], digests[i], indices, counts)
+
+        return self
+
+    def remove(self, document_ids):
+        """
+        Descontar documentos removidos das contagens de frequência
+        """
+        with self._lock:
+            for doc_id in document_ids:
+                previous = self._documents.pop(str(doc_id), None)
+                if previous is not None:
+                    self._subtract(previous[1])
+
+        return self
+
+    def document_ids(self):
+        """
+        IDs dos documentos atualmente contabilizados
+        """
+        with self._lock:
+            return set(self._documents)
+
+    def merge(self, other):
+        """
+        Incorporar as contagens de outro featurizer (ex.: de outro worker)
+        Documentos identificados já contabilizados aqui não são contados de novo;
+        documentos anônimos (sem ID) de ambos os lados são somados
+        """
+        if other.n_features != self.n_features:
+            raise ValueError('Featurizers com números de features diferentes')
+
+        with other._lock:
+            other_frequency = other.document_frequency.copy()
+            other_documents = other.n_documents
+            other_identified = dict(other._documents)
+
+        # Separar as contagens anônimas das contagens por documento
+        for _, indices, _ in other_identified.values():
+            np.subtract.at(other_frequency, indices, 1)
+        other_documents -= len(other_identified)
+
+        with self._lock:
+            self.document_frequency += other_frequency
+            self.n_documents += other_documents
+            for doc_id, (digest, indices, counts) in other_identified.items():
+                if doc_id not in self._documents:
+                    self._add_document(doc_id, digest, indices, counts)
+
+        return self
+
+    @staticmethod
+    def _idf(document_frequency, n_documents):
+        return np.log((1 + n_documents) / (1 + document_frequency)) + 1.0
+
+    def idf(self):
+        """
+        Calcular os pesos IDF suavizados a partir das contagens atuais
+        """
+        with self._lock:
+            document_frequency = self.document_frequency.copy()
+            n_documents = self.n_documents
+
+        return self._idf(document_frequency, n_documents)
+
+    def document_vectors(self, document_ids):
+        """
+        Vetores TF-IDF normalizados (L2) dos documentos já contabilizados, a partir
+        dos vetores TF em cache, sem vetorizar os textos novamente
+
+        Args:
+            document_ids (list): IDs dos documentos, na ordem das linhas
+
+        Returns:
+            scipy.sparse.csr_matrix: Matriz documentos x features
+
+        Raises:
+            KeyError: Se algum documento não foi contabilizado com partial_fit
+        """
+        with self._lock:
+            rows = [self._documents[str(doc_id)] for doc_id in document_ids]
+            idf = self._idf(self.document_frequency, self.n_documents)
+
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(indices) for _, indices, _ in rows], out=indptr[1:])
+        if rows:
+            indices = np.concatenate([indices for _, indices, _ in rows])
+            data = np.concatenate([counts for _, _, counts in rows]).astype(np.float64)
+        else:
+            indices = np.zeros(0, dtype=np.int32)
+            data = np.zeros(0, dtype=np.float64)
+
+        matrix = csr_matrix((data, indices, indptr), shape=(len(rows), self.n_features))
+        matrix.data *= idf[matrix.indices]
+
+        return normalize(matrix, norm='l2', copy=False)
+
+    def transform(self, texts):
+        """
+        Vetorizar textos em TF-IDF normalizado (L2) sem alterar o estado
+
+        Args:
+            texts (list): Textos a vetorizar
+
+        Returns:
+            scipy.sparse.csr_matrix: Matriz documentos x features
+        """
+        matrix = self.hashing_vectorizer.transform(texts).astype(np.float64)
+        idf = self.idf()
+        matrix.data *= idf[matrix.indices]
+
+        return normalize(matrix, norm='l2', copy=False)
@@ -0,0 +1,375 @@
+import numpy as np
+import hashlib
+import logging
+import math
+import numbers
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class PopularityEngine:
+    """
+    Popularidade de projetos com decaimento exponencial sobre um fluxo de eventos
+    Usa decaimento direto (forward decay): os pesos são armazenados relativos a
+    um instante de referência, então o decaimento é um fator comum a todos os
+    scores e não altera a ordenação. Projetos populares ocupam arrays compactos;
+    a cauda longa é aproximada por um count-min sketch
+    """
+
+    EVENT_WEIGHTS = {
+        'view': 1.0,
+        'follow': 3.0,
+        'join': 5.0
+    }
+
+    def __init__(self, half_life_hours=72, capacity=10000, top_size=100,
+                 sketch_width=2 ** 14, sketch_depth=4):
+        if capacity <= top_size:
+            raise ValueError('capacity deve ser maior que top_size')
+
+        self.decay_rate = math.log(2) / (half_life_hours * 3600)
+        self.capacity = capacity
+        self.top_size = top_size
+        self.reference_time = time.time()
+
+        # Itens monitorados: slot -> score e slot -> id
+        self.scores = np.zeros(capacity, dtype=np.float64)
+        self.slot_ids = [None] * capacity
+        self.slots = {}
+
+        # Count-min sketch para a cauda longa
+        self.sketch_width = sketch_width
+        self.sketch_depth = sketch_depth
+        self.sketch = np.zeros((sketch_depth, sketch_width), dtype=np.float64)
+
+        # Ranking mantido incrementalmente, em ordem decrescente de score
+        self._top = []
+        self._lock = threading.Lock()
+
+    def _forward_weight(self, timestamp):
+        return math.exp(self.decay_rate * (timestamp - self.reference_time))
+
+    def _decay_factor(self, now):
+        return math.exp(-self.decay_rate * (now - self.reference_time))
+
+    def _rescale(self, timestamp):
+        """
+        Mover o instante de referência para evitar overflow dos pesos
+        """
+        factor = self._decay_factor(timestamp)
+        self.scores *= factor
+        self.sketch *= factor
+        self.reference_time = timestamp
+
+    def _sketch_columns(self, project_id):
+        digest = hashlib.blake2b(project_id.encode('utf-8'), digest_size=4 * self.sketch_depth).digest()
+        return [
+            int.from_bytes(digest[4 * row:4 * (row + 1)], 'little') % self.sketch_width
+            for row in range(self.sketch_depth)
+        ]
+
+    def _sketch_estimate(self, project_id):
+        columns = self._sketch_columns(project_id)
+        return float(min(self.sketch[row, column] for row, column in enumerate(columns)))
+
+    def _sketch_add(self, project_id, weight):
+        columns = self._sketch_columns(project_id)
+        for row, column in enumerate(columns):
+            self.sketch[row, column] += weight
+
+    @staticmethod
+    def normalize_timestamp(timestamp):
+        """
+        Validar um instante em segundos desde epoch, limitando-o ao instante atual
+
+        Raises:
+            ValueError: Se o instante não for um número finito
+        """
+        now = time.time()
+        if timestamp is None:
+            return now
+        if (isinstance(timestamp, bool) or not isinstance(timestamp, numbers.Real)
+                or not math.isfinite(timestamp)):
+            raise ValueError(f"Timestamp inválido: {timestamp!r}")
+        # Instantes futuros (ex.: milissegundos) deslocariam a referência do decaimento
+        return min(float(timestamp), now)
+
+    def record(self, project_id, event='view', timestamp=None):
+        """
+        Registrar um evento de interação com um projeto
+
+        Args:
+            project_id (str): ID do projeto
+            event (str): Tipo do evento ('view', 'follow' ou 'join')
+            timestamp (float): Instante do evento em segundos (opcional, default: agora);
+                instantes futuros são limitados ao instante atual
+        """
+        weight = self.EVENT_WEIGHTS.get(event)
+        if weight is None:
+            raise ValueError(f"Evento inválido: {event}")
+
+        self.seed(project_id, weight, timestamp)
+
+    def seed(self, project_id, weight, timestamp=None):
+        """
+        Adicionar um peso arbitrário a um projeto (ex.: carga inicial a partir de views)
+        """
+        project_id = str(project_id)
+        timestamp = self.normalize_timestamp(timestamp)
+        if weight <= 0:
+            return
+
+        with self._lock:
+            # exp(700) está próximo do limite de float64
+            if self.decay_rate * (timestamp - self.reference_time) > 600:
+                self._rescale(timestamp)
+
+            weight *= self._forward_weight(timestamp)
+            if weight == 0:
+                return  # Evento antigo demais para afetar o ranking
+
+            slot = self.slots.get(project_id)
+
+            if slot is None:
+                slot = self._claim_slot(project_id, weight)
+                if slot is None:
+                    return
+            else:
+                self.scores[slot] += weight
+
+            self._update_top(project_id, self.scores[slot])
+
+    def _claim_slot(self, project_id, weight):
+        """
+        Alocar um slot para o projeto, promovendo-o a partir do sketch se
+        necessário; retorna None se o projeto permanecer na cauda longa
+        """
+        if len(self.slots) < self.capacity:
+            slot = len(self.slots)
+            estimate = weight
+        else:
+            self._sketch_add(project_id, weight)
+            estimate = self._sketch_estimate(project_id)
+            slot = int(np.argmin(self.scores))
+            if estimate <= self.scores[slot]:
+                return None
+
+            # Rebaixar o item menos popular para o sketch
+            evicted = self.slot_ids[slot]
+            self._sketch_add(evicted, self.scores[slot])
+            del self.slots[evicted]
+            if evicted in self._top:
+                self._top.remove(evicted)
+
+        self.slots[project_id] = slot
+        self.slot_ids[slot] = project_id
+        self.scores[slot] = estimate
+        return slot
+
+    def _update_top(self, project_id, score):
+        """
+        Reposicionar o projeto no ranking ordenado (O(top_size) por evento)
+        """
+        if project_id in self._top:
+            self._top.remove(project_id)
+        elif len(self._top) >= self.top_size:
+            if score <= self.scores[self.slots[self._top[-1]]]:
+                return
+            self._top.pop()
+
+        position = len(self._top)
+        while position > 0 and self.scores[self.slots[self._top[position - 1]]] < score:
+            position -= 1
+        self._top.insert(position, project_id)
+
+    def score(self, project_id, now=None):
+        """
+        Score de popularidade atual (decaído) de um projeto
+        """
+        project_id = str(project_id)
+        now = time.time() if now is None else now
+
+        with self._lock:
+            slot = self.slots.get(project_id)
+            raw = self.scores[slot] if slot is not None else self._sketch_estimate(project_id)
+            return float(raw * self._decay_factor(now))
+
+    def top(self, k=10, now=None):
+        """
+        Projetos em alta, em O(k); no máximo top_size projetos (k=None: todos)
+
+        Returns:
+            list: Lista de tuplas (project_id, score)
+        """
+        now = time.time() if now is None else now
+
+        with self._lock:
+            factor = self._decay_factor(now)
+            return [
+                (project_id, float(self.scores[self.slots[project_id]] * factor))
+                for project_id in self._top[:k]
+            ]
+
+    def discard(self, project_id):
+        """
+        Zerar a popularidade de um projeto (ex.: removido ou tornado privado)
+        """
+        project_id = str(project_id)
+
+        with self._lock:
+            slot = self.slots.get(project_id)
+            if slot is None:
+                return
+
+            # O slot continua alocado e é o primeiro candidato a ser reaproveitado
+            self.scores[slot] = 0.0
+            if project_id in self._top:
+                self._rebuild_top()
+
+    def _rebuild_top(self):
+        """
+        Recalcular o ranking a partir de todos os itens monitorados (O(capacity))
+        """
+        used = len(self.slots)
+        k = min(self.top_size, used)
+        if k == 0:
+            self._top = []
+            return
+
+        candidates = np.argpartition(-self.scores[:used], k - 1)[:k]
+        ranked = sorted(candidates, key=lambda slot: -self.scores[slot])
+        self._top = [self.slot_ids[slot] for slot in ranked if self.scores[slot] > 0]
+
+    def prior(self, project_ids):
+        """
+        Scores de popularidade normalizados em [0, 1] pelo projeto mais popular
+
+        Returns:
+            dict: project_id -> score normalizado
+        """
+        with self._lock:
+            if not self._top:
+                return {str(project_id): 0.0 for project_id in project_ids}
+
+            max_score = self.scores[self.slots[self._top[0]]]
+            priors = {}
+            for project_id in project_ids:
+                project_id = str(project_id)
+                slot = self.slots.get(project_id)
+                raw = self.scores[slot] if slot is not None else self._sketch_estimate(project_id)
+                priors[project_id] = float(min(raw / max_score, 1.0)) if max_score > 0 else 0.0
+
+            return priors
+
+class PopularityEventStream:
+    """
+    Log de eventos de popularidade compartilhado entre workers via Redis Streams
+    Cada worker reaplica o log no seu próprio PopularityEngine, de modo que todos
+    convergem para o mesmo ranking e um worker reiniciado se recupera relendo o log.
+    A leitura roda em uma thread de fundo (start), fora do caminho das requisições;
+    enquanto um worker novo reaplica o log, o ranking reflete os eventos já lidos
+    """
+
+    STREAM_KEY = 'ci-connect:popularity-events'
+
+    def __init__(self, redis_client, max_length=500000, batch_size=1000, block_ms=1000):
+        self.redis = redis_client
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.last_id = '0-0'
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def publish(self, events):
+        """
+        Publicar eventos já validados (project_id, event, timestamp)
+        """
+        pipeline = self.redis.pipeline()
+        for event in events:
+            pipeline.xadd(
+                self.STREAM_KEY,
+                {
+                    'project_id': str(event['project_id']),
+                    'event': event['event'],
+                    'timestamp': repr(float(event['timestamp']))
+                },
+                maxlen=self.max_length,
+                approximate=True
+            )
+        pipeline.execute()
+
+    @staticmethod
+    def _decode(value):
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def consume(self, engine, block_ms=None):
+        """
+        Aplicar ao engine os eventos publicados desde a última leitura
+
+        Args:
+            engine (PopularityEngine): Engine de destino
+            block_ms (int): Tempo máximo de espera por novos eventos (opcional)
+
+        Returns:
+            int: Número de eventos aplicados
+        """
+        applied = 0
+
+        with self._lock:
+            while True:
+                response = self.redis.xread(
+                    {self.STREAM_KEY: self.last_id},
+                    count=self.batch_size,
+                    block=block_ms if applied == 0 else None
+                )
+                if not response:
+                    break
+
+                _, entries = response[0]
+                for entry_id, fields in entries:
+                    fields = {self._decode(key): self._decode(value) for key, value in fields.items()}
+                    try:
+                        engine.record(
+                            fields['project_id'],
+                            event=fields['event'],
+                            timestamp=float(fields['timestamp'])
+                        )
+                        applied += 1
+                    except (KeyError, ValueError) as e:
+                        logger.warning(f"Evento de popularidade ignorado ({self._decode(entry_id)}): {str(e)}")
+                    self.last_id = self._decode(entry_id)
+
+                if len(entries) < self.batch_size:
+                    break
+
+        return applied
+
+    def start(self, engine):
+        """
+        Consumir o stream continuamente em uma thread de fundo (uma por processo)
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, args=(engine,), daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _run(self, engine):
+        while not self._stopped.is_set():
+            try:
+                self.consume(engine, block_ms=self.block_ms)
+            except Exception as e:
+                logger.error(f"Erro ao consumir eventos de popularidade: {str(e)}")
+                self._stopped.wait(self.block_ms / 1000)
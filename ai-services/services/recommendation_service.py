@@ -1,30 +1,71 @@
 import numpy as np
 import pandas as pd
+from bson import ObjectId
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.decomposition import TruncatedSVD
 from sklearn.preprocessing import StandardScaler
 import logging
 from datetime import datetime, timedelta
+import threading
+import time
 from collections import Counter
 import re
 
+from services.hashing_featurizer import HashingFeaturizer
+from services.collaboration_graph import CollaborationGraph
+from services.duplicate_detection import DuplicateDetector
+from services.popularity_engine import PopularityEngine, PopularityEventStream
+
 logger = logging.getLogger(__name__)
 
+def _object_ids(ids):
+    """
+    Converter IDs em string para ObjectId, o tipo dos _id no MongoDB, para uso
+    em filtros como $in; IDs que não são ObjectIds válidos são mantidos
+    """
+    return [ObjectId(i) if ObjectId.is_valid(i) else i for i in ids]
+
 class RecommendationService:
     """
     Serviço de recomendação usando técnicas de Machine Learning
-    Implementa filtragem baseada em conteúdo e filtragem colaborativa
+    Implementa filtragem baseada em conteúdo, filtragem colaborativa e
+    Personalized PageRank sobre o grafo de colaboração
     """
     
-    def __init__(self, database_connection):
+    GRAPH_REFRESH_SECONDS = 300
+    POPULARITY_PRIOR_WEIGHT = 0.1
+    # Project.views é um total histórico: tratado como se tivesse ocorrido há uma semana
+    POPULARITY_SEED_AGE_HOURS = 7 * 24
+    FEATURIZERS = ('tfidf', 'hashing')
+    
+    def __init__(self, database_connection, featurizer='tfidf', redis_client=None):
+        if featurizer not in self.FEATURIZERS:
+            raise ValueError(f"Featurizer inválido: {featurizer}")
+        
         self.db = database_connection
+        self.featurizer = featurizer
         self.tfidf_vectorizer = TfidfVectorizer(
             max_features=5000,
             stop_words='english',
             lowercase=True,
             ngram_range=(1, 2)
         )
+        # Modo 'hashing': vetorização sem vocabulário com DF incremental
+        self.hashing_featurizer = HashingFeaturizer() if featurizer == 'hashing' else None
+        self.collaboration_graph = CollaborationGraph()
+        self._graph_projects = {}
+        self._graph_refreshed_at = None
+        self._graph_refresh_lock = threading.Lock()
+        self.duplicate_detector = DuplicateDetector()
+        self._duplicates_refreshed_at = None
+        self._duplicates_refresh_lock = threading.Lock()
+        self.popularity_engine = PopularityEngine()
+        # Com Redis, os eventos passam por um stream compartilhado entre workers,
+        # consumido em segundo plano a partir do primeiro uso em cada processo
+        self.popularity_stream = PopularityEventStream(redis_client) if redis_client is not None else None
+        self._popularity_started = False
+        self._popularity_start_lock = threading.Lock()
         self.project_vectors = None
         self.user_vectors = None
         self.similarity_matrix = None
@@ -36,21 +77,27 @@ class RecommendationService:
         Args:
             user_id (str): ID do usuário
             limit (int): Número máximo de recomendações
-            algorithm (str): Algoritmo a usar ('content_based' ou 'collaborative')
+            algorithm (str): Algoritmo a usar ('content_based', 'collaborative' ou 'graph')
             
         Returns:
             list: Lista de projetos recomendados com scores
         """
         try:
+            # Sem limite interno: o corte é feito após remover duplicados
             if algorithm == 'content_based':
-                return self._content_based_project_recommendations(user_id, limit)
+                recommendations = self._content_based_project_recommendations(user_id, None)
             elif algorithm == 'collaborative':
-                return self._collaborative_project_recommendations(user_id, limit)
+                recommendations = self._collaborative_project_recommendations(user_id, None)
+            elif algorithm == 'graph':
+                recommendations = self._graph_project_recommendations(user_id, None)
             else:
                 # Híbrido: combina ambos os algoritmos
-                content_recs = self._content_based_project_recommendations(user_id, limit)
-                collab_recs = self._collaborative_project_recommendations(user_id, limit)
-                return self._combine_recommendations(content_recs, collab_recs, limit)
+                content_recs = self._content_based_project_recommendations(user_id, None)
+                collab_recs = self._collaborative_project_recommendations(user_id, None)
+                recommendations = self._combine_recommendations(content_recs, collab_recs, None)
+            
+            recommendations = self._apply_popularity_prior(recommendations)
+            return self._filter_duplicate_projects(recommendations)[:limit]
                 
         except Exception as e:
             logger.error(f"Erro ao gerar recomendações de projetos: {str(e)}")
@@ -85,11 +132,26 @@ class RecommendationService:
         
         # Vetorizar textos usando TF-IDF
         try:
-            tfidf_matrix = self.tfidf_vectorizer.fit_transform(corpus)
-            
-            # Calcular similaridade entre usuário e projetos
-            user_vector = tfidf_matrix[0:1]  # Primeiro vetor (usuário)
-            project_vectors = tfidf_matrix[1:]  # Demais vetores (projetos)
+            if self.featurizer == 'hashing':
+                # Vetorizar apenas projetos novos ou editados e descontar os removidos;
+                # os demais vetores vêm do cache, com o IDF atual
+                project_ids = [str(p['_id']) for p in projects]
+                self.hashing_featurizer.partial_fit(project_texts, document_ids=project_ids)
+                self.hashing_featurizer.remove(
+                    self.hashing_featurizer.document_ids() - set(project_ids)
+                )
+                user_vector = self.hashing_featurizer.transform([user_profile])
+                try:
+                    project_vectors = self.hashing_featurizer.document_vectors(project_ids)
+                except KeyError:
+                    # Projeto removido por uma requisição concorrente entre as duas etapas
+                    project_vectors = self.hashing_featurizer.transform(project_texts)
+            else:
+                tfidf_matrix = self.tfidf_vectorizer.fit_transform(corpus)
+                
+                # Calcular similaridade entre usuário e projetos
+                user_vector = tfidf_matrix[0:1]  # Primeiro vetor (usuário)
+                project_vectors = tfidf_matrix[1:]  # Demais vetores (projetos)
             
             similarities = cosine_similarity(user_vector, project_vectors).flatten()
             
@@ -181,11 +243,363 @@ class RecommendationService:
             logger.error(f"Erro na filtragem colaborativa: {str(e)}")
             return []
     
-    def get_user_recommendations(self, user_id, limit=10, filters=None):
+    def _graph_project_recommendations(self, user_id, limit):
+        """
+        Recomendações por Personalized PageRank no grafo de colaboração
+        """
+        try:
+            graph = self._get_collaboration_graph()
+            source = graph.user_node(user_id)
+            
+            # Projetos onde o usuário já é membro são vizinhos diretos no grafo
+            user_project_ids = {
+                graph.parse_node(node)[1] for node in graph.neighbours(source)
+            }
+            
+            recommendations = []
+            for project_id, score in graph.rank(source, 'project', exclude=user_project_ids, limit=None):
+                project = self._graph_projects.get(project_id)
+                if not project or project.get('visibility', 'public') != 'public':
+                    continue
+                
+                recommendations.append({
+                    'project_id': project_id,
+                    'title': project['title'],
+                    'description': project['description'][:200] + '...',
+                    'tags': project.get('tags', []),
+                    'similarity_score': float(score),
+                    'members_count': len(project.get('members', [])),
+                    'status': project.get('status', 'Unknown')
+                })
+                if limit is not None and len(recommendations) >= limit:
+                    break
+            
+            return recommendations
+            
+        except Exception as e:
+            logger.error(f"Erro na recomendação por grafo: {str(e)}")
+            return []
+    
+    def _graph_user_recommendations(self, user_id, limit, filters=None):
+        """
+        Recomendar usuários por Personalized PageRank no grafo de colaboração
+        """
+        graph = self._get_collaboration_graph()
+        source = graph.user_node(user_id)
+        ranked = graph.rank(source, 'user', exclude={user_id}, limit=None)
+        if not ranked:
+            return []
+        
+        # Buscar todos os candidatos em uma única consulta
+        candidate_filters = {'_id': {'$in': _object_ids(candidate_id for candidate_id, _ in ranked)}}
+        if filters and 'role' in filters:
+            candidate_filters['role'] = filters['role']
+        candidates = {
+            str(candidate['_id']): candidate
+            for candidate in self.db.get_users(filters=candidate_filters)
+        }
+        
+        recommendations = []
+        for candidate_id, score in ranked:
+            candidate = candidates.get(candidate_id)
+            if not candidate:
+                continue
+            
+            recommendations.append({
+                'user_id': str(candidate['_id']),
+                'name': candidate['name'],
+                'role': candidate['role'],
+                'bio': candidate.get('bio', '')[:150] + '...',
+                'similarity_score': float(score),
+                'profile_picture': candidate.get('profile_picture')
+            })
+            if len(recommendations) >= limit:
+                break
+        
+        return recommendations
+    
+    def _refresh_periodically(self, timestamp_attr, lock, refresh):
+        """
+        Executar `refresh` de forma síncrona apenas na primeira vez; depois, quando
+        os dados expiram, sincronizar em segundo plano sem bloquear a requisição
+        """
+        if getattr(self, timestamp_attr) is None:
+            with lock:
+                if getattr(self, timestamp_attr) is None:
+                    refresh()
+            return
+        
+        if time.monotonic() - getattr(self, timestamp_attr) < self.GRAPH_REFRESH_SECONDS:
+            return
+        
+        if not lock.acquire(blocking=False):
+            return  # Sincronização já em andamento
+        
+        def run():
+            try:
+                refresh()
+            except Exception as e:
+                logger.error(f"Erro na sincronização em segundo plano: {str(e)}")
+            finally:
+                lock.release()
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def _get_collaboration_graph(self):
+        """
+        Obter o grafo de colaboração, sincronizando-o com o banco periodicamente
+        """
+        self._refresh_periodically(
+            '_graph_refreshed_at', self._graph_refresh_lock, self.refresh_collaboration_graph
+        )
+        return self.collaboration_graph
+    
+    def refresh_collaboration_graph(self, projects=None):
+        """
+        Sincronizar o grafo com os projetos atuais
+        Apenas projetos cuja vizinhança mudou invalidam o cache de PPR; projetos
+        não públicos ficam fora do grafo para não expor vínculos privados
+        """
+        if projects is None:
+            projects = self.db.get_all_projects()
+        
+        projects = [p for p in projects if p.get('visibility', 'public') == 'public']
+        current = {str(project['_id']): project for project in projects}
+        
+        if self._graph_refreshed_at is None:
+            self.collaboration_graph.build(projects)
+        else:
+            self.collaboration_graph.update_projects(
+                projects, removed_project_ids=set(self._graph_projects) - set(current)
+            )
+        
+        self._graph_projects = current
+        self._graph_refreshed_at = time.monotonic()
+    
+    def _apply_popularity_prior(self, recommendations):
+        """
+        Reordenar recomendações combinando o score do algoritmo com a popularidade recente
+        """
+        if not recommendations:
+            return recommendations
+        
+        self._start_popularity()
+        priors = self.popularity_engine.prior([rec['project_id'] for rec in recommendations])
+        weight = self.POPULARITY_PRIOR_WEIGHT
+        
+        # Cada algoritmo tem sua própria escala: normalizar pelo maior score da lista
+        base_scores = [float(rec.get('combined_score', rec['similarity_score'])) for rec in recommendations]
+        max_base = max(base_scores)
+        
+        for rec, base in zip(recommendations, base_scores):
+            rec['popularity_score'] = priors[rec['project_id']]
+            normalized = base / max_base if max_base > 0 else 0.0
+            rec['ranking_score'] = normalized * (1 - weight) + rec['popularity_score'] * weight
+        
+        recommendations.sort(key=lambda x: x['ranking_score'], reverse=True)
+        return recommendations
+    
+    def record_project_events(self, events):
+        """
+        Registrar eventos de interação (visualização, seguidor, entrada) em projetos
+        Eventos de projetos inexistentes ou não públicos são descartados, para que
+        o ranking contenha apenas projetos exibíveis
+        
+        Args:
+            events (list): Eventos {'project_id', 'event', 'timestamp'} já validados
+            
+        Returns:
+            int: Número de eventos registrados
+        """
+        project_ids = {str(event['project_id']) for event in events}
+        public_ids = {
+            str(project['_id'])
+            for project in self.db.get_projects(filters={
+                '_id': {'$in': _object_ids(project_ids)},
+                'visibility': 'public'
+            })
+        } if project_ids else set()
+        
+        events = [
+            {
+                'project_id': str(event['project_id']),
+                'event': event.get('event', 'view'),
+                'timestamp': self.popularity_engine.normalize_timestamp(event.get('timestamp'))
+            }
+            for event in events
+            if str(event['project_id']) in public_ids
+        ]
+        if not events:
+            return 0
+        
+        if self.popularity_stream is not None:
+            # Aplicados por cada worker ao consumir o stream
+            self.popularity_stream.publish(events)
+        else:
+            for event in events:
+                self.popularity_engine.record(
+                    event['project_id'], event=event['event'], timestamp=event['timestamp']
+                )
+        
+        return len(events)
+    
+    def _start_popularity(self):
+        """
+        Carregar Project.views dos projetos públicos uma vez e iniciar o consumo
+        do stream em segundo plano; requisições nunca leem o Redis
+        """
+        if self._popularity_started:
+            return
+        
+        with self._popularity_start_lock:
+            if self._popularity_started:
+                return
+            
+            try:
+                seed_time = time.time() - self.POPULARITY_SEED_AGE_HOURS * 3600
+                for project in self.db.get_all_projects(filters={'visibility': 'public'}):
+                    self.popularity_engine.seed(
+                        project['_id'],
+                        (project.get('views') or 0) * PopularityEngine.EVENT_WEIGHTS['view'],
+                        timestamp=seed_time
+                    )
+            except Exception as e:
+                logger.error(f"Erro ao carregar popularidade inicial: {str(e)}")
+            
+            if self.popularity_stream is not None:
+                self.popularity_stream.start(self.popularity_engine)
+            self._popularity_started = True
+    
+    def get_trending_projects(self, limit=10):
+        """
+        Projetos em alta segundo a popularidade com decaimento temporal
+        
+        Args:
+            limit (int): Número de projetos, limitado a popularity_engine.top_size
+        """
+        try:
+            self._start_popularity()
+            limit = min(limit, self.popularity_engine.top_size)
+            # Todo o ranking mantido (top_size) é lido, para completar o limite
+            # mesmo que projetos tenham sido removidos ou tornados privados
+            trending = self.popularity_engine.top(None)
+            if not trending:
+                return []
+            
+            project_ids = [project_id for project_id, _ in trending]
+            projects = {
+                str(project['_id']): project
+                for project in self.db.get_projects(filters={'_id': {'$in': _object_ids(project_ids)}})
+            }
+            
+            results = []
+            for project_id, score in trending:
+                if len(results) >= limit:
+                    break
+                
+                project = projects.get(project_id)
+                if not project or project.get('visibility', 'public') != 'public':
+                    # Projetos só entram no ranking quando públicos: este mudou depois
+                    self.popularity_engine.discard(project_id)
+                    continue
+                
+                results.append({
+                    'project_id': project_id,
+                    'title': project['title'],
+                    'tags': project.get('tags', []),
+                    'popularity_score': score,
+                    'members_count': len(project.get('members', [])),
+                    'status': project.get('status', 'Unknown')
+                })
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Erro ao obter projetos em alta: {str(e)}")
+            return []
+    
+    def _filter_duplicate_projects(self, recommendations):
+        """
+        Manter apenas o projeto mais bem ranqueado de cada grupo de duplicados
+        """
+        try:
+            detector = self._get_duplicate_detector()
+            return detector.filter_duplicates(recommendations)
+        except Exception as e:
+            logger.error(f"Erro ao filtrar projetos duplicados: {str(e)}")
+            return recommendations
+    
+    def _get_duplicate_detector(self):
+        """
+        Obter o índice de duplicados, sincronizando-o com o banco periodicamente
+        """
+        self._refresh_periodically(
+            '_duplicates_refreshed_at', self._duplicates_refresh_lock, self.refresh_duplicate_index
+        )
+        return self.duplicate_detector
+    
+    def refresh_duplicate_index(self, projects=None):
+        """
+        Sincronizar o índice de duplicados com os projetos públicos atuais
+        Projetos novos ou editados são (re)indexados e os removidos saem dos grupos
+        """
+        if projects is None:
+            projects = self.db.get_all_projects()
+        
+        projects = [p for p in projects if p.get('visibility', 'public') == 'public']
+        current_ids = {str(project['_id']) for project in projects}
+        
+        self.duplicate_detector.remove_many(self.duplicate_detector.project_ids() - current_ids)
+        
+        # Projetos com texto inalterado são ignorados pelo detector
+        self.duplicate_detector.add_many(
+            (str(project['_id']), self._build_project_text_profile(project))
+            for project in projects
+        )
+        self._duplicates_refreshed_at = time.monotonic()
+    
+    def get_duplicate_project_clusters(self, limit=50):
+        """
+        Listar grupos de projetos quase duplicados
+        """
+        try:
+            detector = self._get_duplicate_detector()
+            duplicate_clusters = detector.clusters()[:limit]
+            
+            # Buscar os títulos de todos os projetos agrupados em uma única consulta
+            project_ids = [project_id for cluster in duplicate_clusters for project_id in cluster]
+            titles = {
+                str(project['_id']): project.get('title')
+                for project in self.db.get_projects(filters={'_id': {'$in': _object_ids(project_ids)}})
+            } if project_ids else {}
+            
+            clusters = []
+            for cluster in duplicate_clusters:
+                projects = [
+                    {'project_id': project_id, 'title': titles.get(project_id)}
+                    for project_id in cluster
+                ]
+                
+                clusters.append({
+                    'canonical_project_id': cluster[0],
+                    'projects': projects,
+                    'size': len(cluster)
+                })
+            
+            return clusters
+            
+        except Exception as e:
+            logger.error(f"Erro ao listar projetos duplicados: {str(e)}")
+            return []
+    
+    def get_user_recommendations(self, user_id, limit=10, filters=None, algorithm='content_based'):
         """
         Recomendar usuários para conectar
         """
         try:
+            if algorithm == 'graph':
+                return self._graph_user_recommendations(user_id, limit, filters)
+            
             # Buscar dados do usuário atual
             current_user = self.db.get_user_by_id(user_id)
             if not current_user:
@@ -250,6 +664,12 @@ class RecommendationService:
                 filters={'created_at': {'$gte': six_months_ago}}
             )
             
+            # Contar cada grupo de projetos duplicados apenas uma vez
+            recent_projects = self._filter_duplicate_projects(
+                [{'project_id': str(p['_id']), 'project': p} for p in recent_projects]
+            )
+            recent_projects = [item['project'] for item in recent_projects]
+            
             # Analisar tecnologias mais usadas
             all_technologies = []
             all_tags = []
@@ -0,0 +1,650 @@
+import numpy as np
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import argparse
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Tipos de coluna: 'string', 'string_list', 'int' e 'datetime'
+USER_COLUMNS = {
+    '_id': 'string',
+    'name': 'string',
+    'email': 'string',
+    'role': 'string',
+    'bio': 'string',
+    'course': 'string',
+    'department': 'string',
+    'profile_picture': 'string',
+    'interests': 'string_list',
+    'skills': 'string_list',
+    'research_areas': 'string_list',
+    'created_at': 'datetime',
+    'updated_at': 'datetime'
+}
+
+PROJECT_COLUMNS = {
+    '_id': 'string',
+    'title': 'string',
+    'description': 'string',
+    'status': 'string',
+    'visibility': 'string',
+    'methodology': 'string',
+    'laboratory': 'string',
+    'academicLeague': 'string',
+    'tags': 'string_list',
+    'views': 'int',
+    'created_at': 'datetime',
+    'updated_at': 'datetime'
+}
+
+MEMBERSHIP_COLUMNS = {
+    'project_id': 'string',
+    'user': 'string',
+    'role': 'string'
+}
+
+TECHNOLOGY_COLUMNS = {
+    'project_id': 'string',
+    'name': 'string',
+    'category': 'string'
+}
+
+# Nomes alternativos usados pelos modelos Mongoose
+FIELD_ALIASES = {
+    'profile_picture': 'profilePicture',
+    'research_areas': 'researchAreas',
+    'created_at': 'createdAt',
+    'updated_at': 'updatedAt'
+}
+
+FORMAT_VERSION = 3
+
+# Margem para diferença de relógio entre o banco e o exportador; reexportar
+# um documento inalterado num delta é inofensivo (upsert)
+DELTA_CLOCK_MARGIN = timedelta(minutes=1)
+
+def _field(document, name):
+    value = document.get(name)
+    if value is None and name in FIELD_ALIASES:
+        value = document.get(FIELD_ALIASES[name])
+    return value
+
+def _has_field(document, name):
+    return name in document or (name in FIELD_ALIASES and FIELD_ALIASES[name] in document)
+
+def _to_timestamp(value):
+    if value is None:
+        return np.nan
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def _load_array(path):
+    try:
+        return np.load(path, mmap_mode='r')
+    except ValueError:
+        # Arrays vazios não podem ser mapeados em memória
+        return np.load(path)
+
+def _from_timestamp(value):
+    if np.isnan(value):
+        return None
+    # Datetimes ingênuos em UTC, como retornados pelo pymongo
+    return datetime.fromtimestamp(float(value), tz=timezone.utc).replace(tzinfo=None)
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _as_naive_utc(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+class SnapshotStore:
+    """
+    Snapshots colunares de usuários e projetos em arrays NumPy mapeados em memória
+    Strings e listas seguem o layout do Arrow (buffer de dados + offsets, com
+    bitmap de validade para distinguir None de ''), de modo que cada coluna é
+    lida em bloco; deltas incrementais são aplicados sobre a base. Cada coluna
+    tem também um bitmap de presença, e campos ausentes no documento original
+    continuam ausentes ao carregar.
+
+    O manifesto é a única referência aos diretórios de dados e é trocado
+    atomicamente, portanto nunca aponta para dados incompletos. Escritas são
+    serializadas por um lock de arquivo, e dados substituídos só são apagados
+    após retention_seconds, para não quebrar leitores que ainda os carregam
+    """
+
+    def __init__(self, path, retention_seconds=600):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self._local = threading.local()
+
+    @contextmanager
+    def lock(self):
+        """
+        Lock exclusivo de escrita (entre processos), reentrante na mesma thread
+        """
+        if getattr(self._local, 'depth', 0):
+            self._local.depth += 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._local.depth = 1
+            try:
+                yield
+            finally:
+                self._local.depth = 0
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # Escrita
+
+    def _write_column(self, directory, name, column_type, values, present):
+        prefix = os.path.join(directory, name)
+        np.save(f"{prefix}.present.npy", np.array(present, dtype=bool))
+
+        if column_type == 'int':
+            np.save(f"{prefix}.npy", np.array([value or 0 for value in values], dtype=np.int64))
+        elif column_type == 'datetime':
+            np.save(f"{prefix}.npy", np.array([_to_timestamp(value) for value in values], dtype=np.float64))
+        elif column_type == 'string':
+            np.save(f"{prefix}.valid.npy", np.array([value is not None for value in values], dtype=bool))
+            self._write_strings(prefix, ['' if value is None else str(value) for value in values])
+        elif column_type == 'string_list':
+            lengths = [len(value or []) for value in values]
+            np.save(f"{prefix}.list_offsets.npy", np.concatenate(([0], np.cumsum(lengths))).astype(np.int64))
+            self._write_strings(prefix, [str(item) for value in values for item in (value or [])])
+        else:
+            raise ValueError(f"Tipo de coluna inválido: {column_type}")
+
+    def _write_strings(self, prefix, strings):
+        encoded = [string.encode('utf-8') for string in strings]
+        lengths = [len(data) for data in encoded]
+        np.save(f"{prefix}.offsets.npy", np.concatenate(([0], np.cumsum(lengths))).astype(np.int64))
+        np.save(f"{prefix}.data.npy", np.frombuffer(b''.join(encoded), dtype=np.uint8))
+
+    def _write_table(self, directory, table, columns, documents):
+        table_dir = os.path.join(directory, table)
+        os.makedirs(table_dir, exist_ok=True)
+
+        for name, column_type in columns.items():
+            self._write_column(
+                table_dir, name, column_type,
+                [_field(doc, name) for doc in documents],
+                [_has_field(doc, name) for doc in documents]
+            )
+
+        return {'rows': len(documents), 'columns': columns}
+
+    def _write_tables(self, directory, users, projects):
+        memberships = []
+        technologies = []
+
+        for project in projects:
+            project_id = str(project['_id'])
+            for member in project.get('members', []):
+                memberships.append({
+                    'project_id': project_id,
+                    'user': member.get('user'),
+                    'role': member.get('role', 'member')
+                })
+            for tech in project.get('technologies', []):
+                technologies.append({
+                    'project_id': project_id,
+                    'name': tech.get('name'),
+                    'category': tech.get('category')
+                })
+
+        return {
+            'users': self._write_table(directory, 'users', USER_COLUMNS, users),
+            'projects': self._write_table(directory, 'projects', PROJECT_COLUMNS, projects),
+            'memberships': self._write_table(directory, 'memberships', MEMBERSHIP_COLUMNS, memberships),
+            'technologies': self._write_table(directory, 'technologies', TECHNOLOGY_COLUMNS, technologies)
+        }
+
+    def _write_manifest(self, manifest):
+        # Escrita atômica para que leitores nunca vejam um manifesto parcial
+        manifest_path = os.path.join(self.path, 'manifest.json')
+        temp_path = f"{manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, manifest_path)
+
+    def read_manifest(self):
+        with open(os.path.join(self.path, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _directories(manifest):
+        return [manifest['base']['name']] + [delta['name'] for delta in manifest['deltas']]
+
+    def _remove_expired(self, manifest):
+        """
+        Apagar diretórios de dados não referenciados pelo manifesto há mais de
+        retention_seconds (a data de modificação marca quando foram substituídos)
+        """
+        referenced = set(self._directories(manifest))
+        expires_before = time.time() - self.retention_seconds
+
+        for entry in os.listdir(self.path):
+            directory = os.path.join(self.path, entry)
+            if ((entry.startswith('base-') or entry.startswith('delta-')) and entry not in referenced
+                    and os.path.getmtime(directory) <= expires_before):
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def export(self, users, projects, snapshot_time=None):
+        """
+        Exportar um snapshot completo, substituindo a base e os deltas existentes
+        A nova base é escrita num diretório próprio e só passa a valer quando o
+        manifesto é trocado; os dados antigos são apagados após o período de retenção
+
+        Args:
+            users (list): Documentos de usuários
+            projects (list): Documentos de projetos
+            snapshot_time (datetime): Instante (UTC) em que os dados foram lidos
+
+        Returns:
+            dict: Manifesto do snapshot
+        """
+        snapshot_time = snapshot_time or _utcnow()
+        base_name = f"base-{uuid.uuid4().hex[:12]}"
+
+        with self.lock():
+            try:
+                previous = self.read_manifest()
+            except FileNotFoundError:
+                previous = None
+
+            manifest = {
+                'format_version': FORMAT_VERSION,
+                'created_at': datetime.now().isoformat(),
+                'snapshot_time': snapshot_time.isoformat(),
+                'base': {
+                    'name': base_name,
+                    'tables': self._write_tables(os.path.join(self.path, base_name), list(users), list(projects))
+                },
+                'deltas': []
+            }
+            self._write_manifest(manifest)
+
+            # Início do período de retenção dos dados substituídos
+            if previous is not None:
+                for name in self._directories(previous):
+                    directory = os.path.join(self.path, name)
+                    if os.path.isdir(directory):
+                        os.utime(directory)
+            self._remove_expired(manifest)
+
+        logger.info(f"Snapshot exportado em {self.path}: {manifest['base']['tables']['users']['rows']} usuários, "
+                    f"{manifest['base']['tables']['projects']['rows']} projetos")
+        return manifest
+
+    def export_delta(self, users, projects, deleted_user_ids=(), deleted_project_ids=(), snapshot_time=None):
+        """
+        Exportar um delta com documentos novos ou alterados e IDs removidos
+
+        Returns:
+            dict: Manifesto atualizado
+        """
+        snapshot_time = snapshot_time or _utcnow()
+
+        # O manifesto é lido e reescrito sob o lock para que deltas concorrentes não se percam
+        with self.lock():
+            manifest = self.read_manifest()
+            name = f"delta-{len(manifest['deltas']) + 1:04d}-{uuid.uuid4().hex[:8]}"
+            directory = os.path.join(self.path, name)
+
+            tables = self._write_tables(directory, list(users), list(projects))
+            with open(os.path.join(directory, 'deleted.json'), 'w', encoding='utf-8') as f:
+                json.dump({
+                    'users': [str(user_id) for user_id in deleted_user_ids],
+                    'projects': [str(project_id) for project_id in deleted_project_ids]
+                }, f)
+
+            manifest['deltas'].append({
+                'name': name,
+                'created_at': datetime.now().isoformat(),
+                'tables': tables
+            })
+            manifest['snapshot_time'] = snapshot_time.isoformat()
+            self._write_manifest(manifest)
+            self._remove_expired(manifest)
+
+        return manifest
+
+    def current_ids(self):
+        """
+        IDs de usuários e projetos no estado atual (base + deltas), lendo apenas
+        as colunas de ID
+
+        Returns:
+            tuple: (set de IDs de usuários, set de IDs de projetos)
+        """
+        manifest = self._checked_manifest()
+        directories = self._directories(manifest)
+        user_ids, project_ids = set(), set()
+
+        for index, name in enumerate(directories):
+            directory = os.path.join(self.path, name)
+            user_ids.update(self._read_strings(os.path.join(directory, 'users', '_id')))
+            project_ids.update(self._read_strings(os.path.join(directory, 'projects', '_id')))
+
+            if index > 0:
+                deleted = self._read_deleted(directory)
+                user_ids.difference_update(deleted['users'])
+                project_ids.difference_update(deleted['projects'])
+
+        return user_ids, project_ids
+
+    # Leitura
+
+    def _read_strings(self, prefix):
+        offsets = _load_array(f"{prefix}.offsets.npy")
+        # Uma única cópia do buffer; as strings são fatias dele
+        data = _load_array(f"{prefix}.data.npy").tobytes()
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+    def _read_column(self, directory, name, column_type):
+        prefix = os.path.join(directory, name)
+
+        if column_type == 'int':
+            return _load_array(f"{prefix}.npy").tolist()
+        if column_type == 'datetime':
+            return [_from_timestamp(value) for value in _load_array(f"{prefix}.npy")]
+        if column_type == 'string':
+            valid = _load_array(f"{prefix}.valid.npy")
+            return [
+                value if is_valid else None
+                for value, is_valid in zip(self._read_strings(prefix), valid)
+            ]
+        if column_type == 'string_list':
+            list_offsets = _load_array(f"{prefix}.list_offsets.npy")
+            items = self._read_strings(prefix)
+            return [items[list_offsets[i]:list_offsets[i + 1]] for i in range(len(list_offsets) - 1)]
+        raise ValueError(f"Tipo de coluna inválido: {column_type}")
+
+    def read_table(self, directory, table, columns):
+        """
+        Ler uma tabela como dicionário coluna -> lista de valores
+        """
+        table_dir = os.path.join(directory, table)
+        return {
+            name: self._read_column(table_dir, name, column_type)
+            for name, column_type in columns.items()
+        }
+
+    def _read_presence(self, directory, table, columns):
+        table_dir = os.path.join(directory, table)
+        return {
+            name: _load_array(os.path.join(table_dir, f"{name}.present.npy"))
+            for name in columns
+        }
+
+    def _read_documents(self, directory):
+        users_table = self.read_table(directory, 'users', USER_COLUMNS)
+        projects_table = self.read_table(directory, 'projects', PROJECT_COLUMNS)
+        memberships = self.read_table(directory, 'memberships', MEMBERSHIP_COLUMNS)
+        technologies = self.read_table(directory, 'technologies', TECHNOLOGY_COLUMNS)
+
+        members_by_project = defaultdict(list)
+        for project_id, user, role in zip(memberships['project_id'], memberships['user'], memberships['role']):
+            members_by_project[project_id].append({'user': user, 'role': role})
+
+        technologies_by_project = defaultdict(list)
+        for project_id, name, category in zip(technologies['project_id'], technologies['name'], technologies['category']):
+            technologies_by_project[project_id].append({'name': name, 'category': category})
+
+        users = self._rows(users_table, self._read_presence(directory, 'users', USER_COLUMNS))
+        projects = self._rows(projects_table, self._read_presence(directory, 'projects', PROJECT_COLUMNS))
+        for project in projects:
+            project['members'] = members_by_project.get(project['_id'], [])
+            project['technologies'] = technologies_by_project.get(project['_id'], [])
+
+        return users, projects
+
+    @staticmethod
+    def _rows(table, presence):
+        """
+        Montar documentos a partir das colunas, omitindo campos ausentes no original
+        (preserva o comportamento de .get(campo, default) dos consumidores)
+        """
+        names = list(table)
+        rows = []
+        for row in range(len(table[names[0]]) if names else 0):
+            rows.append({name: table[name][row] for name in names if presence[name][row]})
+        return rows
+
+    @staticmethod
+    def _read_deleted(directory):
+        with open(os.path.join(directory, 'deleted.json'), encoding='utf-8') as f:
+            return json.load(f)
+
+    def _checked_manifest(self):
+        manifest = self.read_manifest()
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Versão de snapshot não suportada: {manifest.get('format_version')}")
+        return manifest
+
+    def load(self, attempts=3):
+        """
+        Carregar o snapshot (base + deltas) em memória
+        Se os dados do manifesto lido forem apagados durante a leitura (exportação
+        concorrente após o período de retenção), o manifesto é lido novamente
+
+        Returns:
+            tuple: (usuários, projetos) como listas de documentos
+        """
+        for attempt in range(attempts):
+            try:
+                return self._load()
+            except FileNotFoundError:
+                if attempt == attempts - 1:
+                    raise
+                logger.warning(f"Snapshot em {self.path} substituído durante a leitura; tentando novamente")
+
+    def _load(self):
+        manifest = self._checked_manifest()
+
+        users, projects = self._read_documents(os.path.join(self.path, manifest['base']['name']))
+        users = {user['_id']: user for user in users}
+        projects = {project['_id']: project for project in projects}
+
+        for delta in manifest['deltas']:
+            directory = os.path.join(self.path, delta['name'])
+            delta_users, delta_projects = self._read_documents(directory)
+
+            users.update((user['_id'], user) for user in delta_users)
+            projects.update((project['_id'], project) for project in delta_projects)
+
+            deleted = self._read_deleted(directory)
+            for user_id in deleted['users']:
+                users.pop(user_id, None)
+            for project_id in deleted['projects']:
+                projects.pop(project_id, None)
+
+        return list(users.values()), list(projects.values())
+
+def _matches(document, filters):
+    """
+    Avaliar um subconjunto dos filtros do MongoDB ($eq, $ne, $in, $nin, $gt, $gte, $lt, $lte)
+    """
+    for field, condition in (filters or {}).items():
+        value = document.get(field)
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+
+        for operator, operand in condition.items():
+            # IDs podem chegar como ObjectId ou string
+            if field == '_id':
+                value = str(value)
+                operand = [str(item) for item in operand] if isinstance(operand, (list, tuple, set)) else str(operand)
+
+            if operator == '$eq' and value != operand:
+                return False
+            if operator == '$ne' and value == operand:
+                return False
+            if operator == '$in' and value not in operand:
+                return False
+            if operator == '$nin' and value in operand:
+                return False
+            if operator in ('$gt', '$gte', '$lt', '$lte'):
+                if value is None:
+                    return False
+                if operator == '$gt' and not value > operand:
+                    return False
+                if operator == '$gte' and not value >= operand:
+                    return False
+                if operator == '$lt' and not value < operand:
+                    return False
+                if operator == '$lte' and not value <= operand:
+                    return False
+
+    return True
+
+class SnapshotDatabase:
+    """
+    Conexão somente leitura servida a partir de um snapshot em memória
+    Implementa as consultas usadas pelos serviços, permitindo executar jobs
+    offline e benchmarks sem MongoDB. Os dados ficam congelados no instante do
+    snapshot: não deve substituir o MongoDB em produção
+    """
+
+    def __init__(self, users, projects):
+        self.users = {str(user['_id']): user for user in users}
+        self.projects = {str(project['_id']): project for project in projects}
+
+        self.projects_by_user = defaultdict(list)
+        for project in self.projects.values():
+            for member in project.get('members', []):
+                self.projects_by_user[str(member['user'])].append(project)
+
+    @classmethod
+    def load(cls, path):
+        users, projects = SnapshotStore(path).load()
+        logger.info(f"Snapshot carregado de {path}: {len(users)} usuários, {len(projects)} projetos")
+        return cls(users, projects)
+
+    def get_user_by_id(self, user_id):
+        return self.users.get(str(user_id))
+
+    def get_all_users(self):
+        return list(self.users.values())
+
+    def get_users(self, filters=None):
+        return [user for user in self.users.values() if _matches(user, filters)]
+
+    def get_all_projects(self, filters=None):
+        return [project for project in self.projects.values() if _matches(project, filters)]
+
+    def get_projects(self, filters=None):
+        return self.get_all_projects(filters=filters)
+
+    def get_user_projects(self, user_id):
+        return list(self.projects_by_user.get(str(user_id), []))
+
+def export_from_database(store, database):
+    """
+    Exportar um snapshot completo a partir do MongoDB
+
+    Args:
+        store (SnapshotStore): Snapshot de destino
+        database (pymongo.database.Database): Banco de origem
+
+    O instante do snapshot é capturado antes da leitura, de modo que alterações
+    feitas durante a exportação entram no próximo delta
+    """
+    with store.lock():
+        snapshot_time = _utcnow()
+        return store.export(database.users.find(), database.projects.find(), snapshot_time=snapshot_time)
+
+def export_delta_from_database(store, database, since=None):
+    """
+    Exportar um delta com os documentos alterados desde o último snapshot e os
+    IDs que deixaram de existir no banco
+    Apenas documentos com updatedAt >= since são lidos por inteiro; remoções são
+    detectadas comparando os IDs do snapshot com uma projeção só de _id
+
+    Args:
+        store (SnapshotStore): Snapshot de destino (já exportado)
+        database (pymongo.database.Database): Banco de origem
+        since (datetime): Instante UTC a partir do qual exportar alterações
+            (opcional, default: instante do último snapshot registrado no manifesto)
+
+    Returns:
+        dict: Manifesto atualizado
+    """
+    # O lock cobre leitura e escrita: um delta concorrente espera e parte deste
+    with store.lock():
+        if since is None:
+            since = datetime.fromisoformat(store.read_manifest()['snapshot_time']) - DELTA_CLOCK_MARGIN
+        since = _as_naive_utc(since)
+        snapshot_time = _utcnow()
+
+        # Documentos sem updatedAt (anteriores aos timestamps do Mongoose) são sempre exportados
+        changed = {'$or': [{'updatedAt': {'$gte': since}}, {'updatedAt': {'$exists': False}}]}
+        users = list(database.users.find(changed))
+        projects = list(database.projects.find(changed))
+
+        known_user_ids, known_project_ids = store.current_ids()
+        deleted_user_ids = known_user_ids - {str(user['_id']) for user in database.users.find({}, {'_id': 1})}
+        deleted_project_ids = known_project_ids - {
+            str(project['_id']) for project in database.projects.find({}, {'_id': 1})
+        }
+
+        logger.info(f"Delta: {len(users)} usuários e {len(projects)} projetos alterados, "
+                    f"{len(deleted_user_ids)} usuários e {len(deleted_project_ids)} projetos removidos")
+        return store.export_delta(
+            users,
+            projects,
+            deleted_user_ids=sorted(deleted_user_ids),
+            deleted_project_ids=sorted(deleted_project_ids),
+            snapshot_time=snapshot_time
+        )
+
+def main():
+    """
+    Exportar snapshots a partir do MongoDB
+
+    Uso:
+        python -m services.snapshot_store export <path>
+        python -m services.snapshot_store delta <path> [--since 2024-01-01T00:00:00]
+    """
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    parser = argparse.ArgumentParser(description='Snapshots colunares do CI-Connect')
+    parser.add_argument('command', choices=['export', 'delta'])
+    parser.add_argument('path')
+    parser.add_argument('--since', help='Data ISO (UTC) a partir da qual exportar alterações '
+                                        '(delta; default: instante do último snapshot)')
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    client = MongoClient(os.getenv('MONGODB_URI', 'mongodb://localhost:27017/ci-connect'))
+    database = client.get_default_database('ci-connect')
+    store = SnapshotStore(args.path)
+
+    if args.command == 'export':
+        export_from_database(store, database)
+    else:
+        since = datetime.fromisoformat(args.since) if args.since else None
+        export_delta_from_database(store, database, since=since)
+
+if __name__ == '__main__':
+    main()
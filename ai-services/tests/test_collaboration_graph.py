@@ -0,0 +1,116 @@
+import threading
+
+import numpy as np
+import pytest
+
+from services.collaboration_graph import CollaborationGraph
+
+
+PROJECTS = [
+    {'_id': 'p1', 'members': [{'user': 'a'}, {'user': 'b'}], 'laboratory': 'lab1'},
+    {'_id': 'p2', 'members': [{'user': 'b'}, {'user': 'c'}], 'academicLeague': 'league1'},
+    {'_id': 'p3', 'members': [{'user': 'd'}], 'laboratory': 'lab1'},
+    {'_id': 'p4', 'members': [{'user': 'c'}, {'user': 'e'}], 'academicLeague': 'league1'},
+    {'_id': 'p5', 'members': [{'user': 'z'}]},
+]
+
+
+def power_iteration_ppr(graph, source, alpha, iterations=500):
+    nodes = sorted(graph.adjacency)
+    index = {node: i for i, node in enumerate(nodes)}
+    transition = np.zeros((len(nodes), len(nodes)))
+    for node, neighbours in graph.adjacency.items():
+        for neighbour in neighbours:
+            transition[index[node], index[neighbour]] = 1.0 / len(neighbours)
+
+    teleport = np.zeros(len(nodes))
+    teleport[index[source]] = 1.0
+    scores = teleport.copy()
+    for _ in range(iterations):
+        scores = alpha * teleport + (1 - alpha) * scores @ transition
+
+    return {node: scores[index[node]] for node in nodes}
+
+
+def test_push_matches_power_iteration():
+    graph = CollaborationGraph(alpha=0.15, epsilon=1e-9)
+    graph.build(PROJECTS)
+
+    approximate = graph.personalized_pagerank('user:a')
+    exact = power_iteration_ppr(graph, 'user:a', alpha=0.15)
+
+    for node, score in exact.items():
+        assert approximate.get(node, 0.0) == pytest.approx(score, abs=1e-6)
+
+
+def test_push_only_touches_connected_component():
+    graph = CollaborationGraph()
+    graph.build(PROJECTS)
+
+    scores = graph.personalized_pagerank('user:a')
+
+    assert 'project:p5' not in scores
+    assert 'user:z' not in scores
+
+
+def test_rank_filters_type_and_exclusions():
+    graph = CollaborationGraph()
+    graph.build(PROJECTS)
+
+    ranked = graph.rank('user:a', 'project', exclude={'p1'})
+
+    assert [project_id for project_id, _ in ranked][:1] in (['p2'], ['p3'])
+    assert all(project_id != 'p1' for project_id, _ in ranked)
+    assert all(score > 0 for _, score in ranked)
+
+
+def test_update_invalidates_only_affected_cache_entries():
+    graph = CollaborationGraph()
+    graph.build(PROJECTS)
+    graph.personalized_pagerank('user:a')
+    graph.personalized_pagerank('user:z')
+
+    graph.update_project({'_id': 'p5', 'members': [{'user': 'z'}, {'user': 'y'}]})
+    assert 'user:a' in graph._ppr_cache
+    assert 'user:z' not in graph._ppr_cache
+
+    graph.update_project({'_id': 'p2', 'members': [{'user': 'b'}]})
+    assert 'user:a' not in graph._ppr_cache
+
+
+def test_remove_project_drops_edges():
+    graph = CollaborationGraph()
+    graph.build(PROJECTS)
+
+    graph.remove_project('p5')
+
+    assert 'project:p5' not in graph.adjacency
+    assert 'user:z' not in graph.adjacency
+    assert graph.personalized_pagerank('user:z') == {}
+
+
+def test_batch_update_matches_rebuild():
+    graph = CollaborationGraph()
+    graph.build(PROJECTS)
+
+    edited = [dict(PROJECTS[1], members=[{'user': 'b'}, {'user': 'f'}]), PROJECTS[0], PROJECTS[2]]
+    graph.update_projects(edited + [PROJECTS[4]], removed_project_ids=['p4'])
+
+    expected = CollaborationGraph()
+    expected.build(edited + [PROJECTS[4]])
+    assert graph.adjacency == expected.adjacency
+
+
+def test_pagerank_does_not_wait_for_graph_updates():
+    graph = CollaborationGraph()
+    graph.build(PROJECTS)
+    result = {}
+
+    # Uma atualização em andamento não bloqueia o cálculo sobre a versão vigente
+    with graph._write_lock:
+        thread = threading.Thread(target=lambda: result.update(graph.personalized_pagerank('user:a')))
+        thread.start()
+        thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert result['user:a'] > 0
@@ -0,0 +1,179 @@
+import random
+
+import numpy as np
+
+from services.duplicate_detection import DuplicateDetector
+
+
+VOCABULARY = (
+    "sistema plataforma aplicação web mobile dados análise aprendizado máquina rede neural "
+    "visão computacional processamento linguagem natural estudantes professores centro "
+    "informática pesquisa desenvolvimento ferramenta gestão eventos laboratório otimização "
+    "algoritmo grafos segurança redes computadores nuvem microsserviços banco consultas "
+    "desempenho interface usuário acessibilidade saúde educação ensino robótica sensores "
+    "energia monitoramento previsão classificação imagens médicas chatbot recomendação"
+).split()
+
+BASE_TEXT = (
+    "Plataforma de recomendação de projetos acadêmicos para estudantes do centro de "
+    "informática usando aprendizado de máquina e análise de redes python react mongodb"
+)
+
+
+def random_profile(rng, length=25):
+    return ' '.join(rng.choice(VOCABULARY) for _ in range(length))
+
+
+# Perfis curtos do mesmo domínio, no formato de _build_project_text_profile
+KINDS = ['Sistema de', 'Plataforma de', 'Aplicativo de', 'Ferramenta de', 'Portal de']
+SUBJECTS = [
+    'monitoramento de energia', 'ensino de programação', 'gestão de eventos', 'análise de dados de saúde',
+    'recomendação de projetos', 'detecção de fraudes', 'controle de estoque', 'acessibilidade web',
+    'robótica educacional', 'visão computacional', 'segurança de redes', 'agendamento de laboratórios',
+    'previsão de evasão escolar', 'telemedicina', 'mobilidade urbana', 'gestão de resíduos'
+]
+AUDIENCES = [
+    'para estudantes do centro de informática', 'para professores da universidade',
+    'para a comunidade acadêmica', 'para escolas da rede pública', 'para laboratórios de pesquisa'
+]
+METHODS = [
+    'usando aprendizado de máquina', 'com sensores iot', 'usando análise de grafos',
+    'com computação em nuvem', 'usando processamento de imagens', 'com dashboards interativos'
+]
+TAGS = ['ia', 'web', 'mobile', 'dados', 'saude', 'educacao', 'iot', 'seguranca', 'nuvem', 'pesquisa']
+TECHS = ['python', 'react', 'nodejs', 'mongodb', 'flask', 'django', 'tensorflow', 'postgresql', 'docker', 'flutter']
+
+
+def short_project_profile(rng):
+    title = f"{rng.choice(KINDS)} {rng.choice(SUBJECTS)}"
+    description = f"{title} {rng.choice(AUDIENCES)} {rng.choice(METHODS)}"
+    words = [title, description] + rng.sample(TAGS, rng.randint(2, 4)) + rng.sample(TECHS, rng.randint(2, 4))
+    return ' '.join(words)
+
+
+def test_identical_and_near_identical_texts_are_grouped():
+    detector = DuplicateDetector()
+    detector.add('a', BASE_TEXT)
+    detector.add('b', BASE_TEXT + ' flask')
+    detector.add('c', 'Sistema de monitoramento de energia com sensores iot e previsão de consumo')
+
+    assert detector.clusters() == [['a', 'b']]
+    assert detector.canonical('b') == 'a'
+    assert detector.canonical('c') == 'c'
+
+
+def test_single_edit_recall():
+    rng = random.Random(7)
+    detected = 0
+    trials = 200
+
+    for trial in range(trials):
+        detector = DuplicateDetector()
+        words = random_profile(rng).split()
+        original = ' '.join(words)
+        words.insert(rng.randrange(len(words) + 1), rng.choice(VOCABULARY))
+
+        detector.add('original', original)
+        detected += bool(detector.add('edited', ' '.join(words)))
+
+    assert detected / trials >= 0.9
+
+
+def test_short_same_domain_profiles_are_not_grouped():
+    rng = random.Random(11)
+    detector = DuplicateDetector()
+    detector.add_many((f"p{i}", short_project_profile(rng)) for i in range(400))
+
+    assert detector.clusters() == []
+
+
+def test_short_profile_edit_recall():
+    rng = random.Random(5)
+    detected = 0
+    trials = 200
+
+    for _ in range(trials):
+        detector = DuplicateDetector()
+        profile = short_project_profile(rng)
+        detector.add('original', profile)
+        detected += bool(detector.add('edited', profile + ' ' + rng.choice(TECHS + TAGS)))
+
+    assert detected / trials >= 0.9
+
+
+def test_close_fingerprints_with_different_content_are_not_duplicates():
+    # Fingerprints a 6 bits de distância, mas público, tags e tecnologias diferentes
+    detector = DuplicateDetector()
+    detector.add('a', 'Ferramenta de análise de dados de saúde para laboratórios de pesquisa '
+                      'com computação em nuvem nuvem educacao react nodejs flask')
+    detector.add('b', 'Ferramenta de análise de dados de saúde para a comunidade acadêmica '
+                      'com computação em nuvem educacao dados tensorflow flask react mongodb')
+
+    assert detector.clusters() == []
+
+
+def test_remove_splits_cluster_and_cleans_index():
+    detector = DuplicateDetector()
+    detector.add('a', BASE_TEXT)
+    detector.add('b', BASE_TEXT + ' flask')
+
+    detector.remove('a')
+
+    assert detector.clusters() == []
+    assert detector.canonical('b') == 'b'
+    assert 'a' not in detector
+    assert all('a' not in bucket for bucket in detector.buckets.values())
+
+
+class FixedFingerprintDetector(DuplicateDetector):
+    """Usa o próprio texto como fingerprint (e features idênticas), para montar distâncias exatas"""
+
+    def _fingerprint(self, text):
+        return int(text, 2), np.array([1], dtype=np.uint64)
+
+
+def test_chained_projects_are_not_grouped_transitively():
+    detector = FixedFingerprintDetector(max_distance=3)
+    detector.add('a', '0')
+    detector.add('b', '111')
+    detector.add('c', '111111')
+
+    # 'c' está a 3 bits de 'b', mas a 6 do representante 'a'
+    assert detector.clusters() == [['a', 'b']]
+    assert detector.canonical('c') == 'c'
+
+    detector.remove('a')
+
+    assert detector.clusters() == [['b', 'c']]
+
+
+def test_edited_project_leaves_cluster():
+    detector = DuplicateDetector()
+    detector.add('a', BASE_TEXT)
+    detector.add('b', BASE_TEXT)
+
+    detector.update('a', 'Robótica educacional com sensores para o ensino de física no laboratório')
+
+    assert detector.clusters() == []
+    assert detector.canonical('a') == 'a'
+
+
+def test_edited_representative_stays_canonical():
+    detector = DuplicateDetector()
+    detector.add('original', BASE_TEXT)
+    detector.add('copy', BASE_TEXT + ' flask')
+
+    detector.update('original', BASE_TEXT + ' docker')
+
+    assert detector.clusters() == [['original', 'copy']]
+    assert detector.canonical('copy') == 'original'
+
+
+def test_filter_duplicates_keeps_best_ranked_item():
+    detector = DuplicateDetector()
+    detector.add('a', BASE_TEXT)
+    detector.add('b', BASE_TEXT)
+
+    items = [{'project_id': 'b'}, {'project_id': 'x'}, {'project_id': 'a'}]
+
+    assert detector.filter_duplicates(items) == [{'project_id': 'b'}, {'project_id': 'x'}]
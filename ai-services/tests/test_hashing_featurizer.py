@@ -0,0 +1,106 @@
+import threading
+
+import numpy as np
+import pytest
+
+from services.hashing_featurizer import HashingFeaturizer
+
+
+def make_featurizer():
+    return HashingFeaturizer(n_features=2 ** 12)
+
+
+def test_partial_fit_counts_each_document_once():
+    featurizer = make_featurizer()
+    featurizer.partial_fit(['machine learning', 'web development'], document_ids=['a', 'b'])
+    featurizer.partial_fit(['machine learning', 'web development'], document_ids=['a', 'b'])
+
+    assert featurizer.n_documents == 2
+    assert featurizer.document_ids() == {'a', 'b'}
+
+
+def test_edited_document_replaces_old_counts():
+    featurizer = make_featurizer()
+    featurizer.partial_fit(['python flask'], document_ids=['a'])
+    featurizer.partial_fit(['react javascript'], document_ids=['a'])
+
+    expected = make_featurizer().partial_fit(['react javascript'], document_ids=['a'])
+    assert featurizer.n_documents == 1
+    np.testing.assert_array_equal(featurizer.document_frequency, expected.document_frequency)
+
+
+def test_remove_subtracts_counts():
+    featurizer = make_featurizer()
+    featurizer.partial_fit(['python flask', 'react javascript'], document_ids=['a', 'b'])
+    featurizer.remove(['a', 'missing'])
+
+    expected = make_featurizer().partial_fit(['react javascript'], document_ids=['b'])
+    assert featurizer.n_documents == 1
+    np.testing.assert_array_equal(featurizer.document_frequency, expected.document_frequency)
+
+
+def test_merge_does_not_double_count_shared_documents():
+    worker1 = make_featurizer().partial_fit(['python flask', 'react javascript'], document_ids=['a', 'b'])
+    worker2 = make_featurizer().partial_fit(['python flask', 'react javascript'], document_ids=['a', 'b'])
+    worker2.partial_fit(['mongodb database'], document_ids=['c'])
+    worker2.partial_fit(['anonymous text'])
+
+    worker1.merge(worker2)
+
+    expected = make_featurizer().partial_fit(
+        ['python flask', 'react javascript', 'mongodb database'], document_ids=['a', 'b', 'c']
+    ).partial_fit(['anonymous text'])
+    assert worker1.n_documents == 4
+    np.testing.assert_array_equal(worker1.document_frequency, expected.document_frequency)
+
+
+def test_concurrent_partial_fit_counts_new_document_once():
+    featurizer = make_featurizer()
+    barrier = threading.Barrier(8)
+
+    def fit():
+        barrier.wait()
+        featurizer.partial_fit(['deep learning research'], document_ids=['a'])
+
+    threads = [threading.Thread(target=fit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert featurizer.n_documents == 1
+    assert featurizer.document_frequency.max() == 1
+
+
+def test_transform_is_normalized_and_stateless():
+    featurizer = make_featurizer().partial_fit(['python flask', 'react javascript'], document_ids=['a', 'b'])
+    before = featurizer.document_frequency.copy()
+
+    vectors = featurizer.transform(['python flask api', ''])
+
+    assert vectors.shape == (2, featurizer.n_features)
+    assert np.linalg.norm(vectors[0].toarray()) == pytest.approx(1.0)
+    assert vectors[1].nnz == 0
+    np.testing.assert_array_equal(featurizer.document_frequency, before)
+
+
+def test_document_vectors_match_transform_and_skip_unchanged_texts():
+    featurizer = make_featurizer()
+    texts = ['python flask api', 'react javascript web', 'python data science']
+    featurizer.partial_fit(texts, document_ids=['a', 'b', 'c'])
+
+    vectorized = []
+    original_transform = featurizer.hashing_vectorizer.transform
+    featurizer.hashing_vectorizer.transform = lambda batch: vectorized.extend(batch) or original_transform(batch)
+    featurizer.partial_fit(texts[:2] + ['python machine learning'], document_ids=['a', 'b', 'c'])
+    featurizer.hashing_vectorizer.transform = original_transform
+
+    # Apenas o documento editado é vetorizado novamente
+    assert vectorized == ['python machine learning']
+
+    cached = featurizer.document_vectors(['c', 'a'])
+    expected = featurizer.transform(['python machine learning', 'python flask api'])
+    np.testing.assert_allclose(cached.toarray(), expected.toarray(), rtol=1e-6)
+
+    with pytest.raises(KeyError):
+        featurizer.document_vectors(['missing'])
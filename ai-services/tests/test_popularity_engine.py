@@ -0,0 +1,153 @@
+import time
+
+import pytest
+
+from services.popularity_engine import PopularityEngine, PopularityEventStream
+
+
+HALF_LIFE = 72 * 3600
+
+
+def test_scores_decay_with_half_life():
+    engine = PopularityEngine(half_life_hours=72)
+    now = time.time()
+    engine.record('a', 'view', timestamp=now - HALF_LIFE)
+
+    assert engine.score('a', now=now) == pytest.approx(0.5)
+    assert engine.score('a', now=now + HALF_LIFE) == pytest.approx(0.25)
+
+
+def test_recent_activity_outranks_older_activity():
+    engine = PopularityEngine(half_life_hours=72)
+    now = time.time()
+    for _ in range(10):
+        engine.record('old', 'view', timestamp=now - 2 * HALF_LIFE)
+    for _ in range(3):
+        engine.record('new', 'view', timestamp=now)
+    engine.record('followed', 'follow', timestamp=now - HALF_LIFE)
+
+    ranking = engine.top(3, now=now)
+
+    assert [project_id for project_id, _ in ranking] == ['new', 'old', 'followed']
+    assert [score for _, score in ranking] == pytest.approx([3.0, 2.5, 1.5])
+
+
+def test_top_k_is_sorted_and_bounded():
+    engine = PopularityEngine(capacity=50, top_size=5)
+    now = time.time()
+    for i in range(20):
+        for _ in range(i + 1):
+            engine.record(f"p{i}", 'view', timestamp=now)
+
+    ranking = engine.top(3)
+
+    assert [project_id for project_id, _ in ranking] == ['p19', 'p18', 'p17']
+    assert len(engine.top(100)) == 5
+
+
+def test_long_tail_item_is_promoted_from_sketch():
+    engine = PopularityEngine(capacity=3, top_size=2)
+    now = time.time()
+    for project_id in ('a', 'b', 'c'):
+        engine.record(project_id, 'view', timestamp=now)
+
+    # 'd' não tem slot livre: acumula no sketch até superar o menos popular
+    for _ in range(3):
+        engine.record('d', 'view', timestamp=now)
+
+    assert 'd' in engine.slots
+    assert len(engine.slots) == 3
+    assert engine.top(1)[0][0] == 'd'
+    assert engine.score('d', now=now) == pytest.approx(3.0)
+
+
+def test_future_timestamps_are_clamped():
+    engine = PopularityEngine()
+    now = time.time()
+    for _ in range(50):
+        engine.record('a', 'view', timestamp=now)
+
+    # Timestamp em milissegundos (Date.now())
+    engine.record('b', 'view', timestamp=now * 1000)
+
+    assert engine.score('a') == pytest.approx(50.0, rel=1e-3)
+    assert engine.score('b') == pytest.approx(1.0, rel=1e-3)
+    assert engine.top(2)[0][0] == 'a'
+
+
+@pytest.mark.parametrize('timestamp', ['1700000000', float('nan'), float('inf'), True])
+def test_invalid_timestamps_are_rejected(timestamp):
+    engine = PopularityEngine()
+
+    with pytest.raises(ValueError):
+        engine.record('a', 'view', timestamp=timestamp)
+    assert engine.top(1) == []
+
+
+def test_prior_is_normalized_by_most_popular():
+    engine = PopularityEngine()
+    now = time.time()
+    for _ in range(4):
+        engine.record('a', 'view', timestamp=now)
+    engine.record('b', 'view', timestamp=now)
+
+    priors = engine.prior(['a', 'b', 'unknown'])
+
+    assert priors['a'] == pytest.approx(1.0)
+    assert priors['b'] == pytest.approx(0.25)
+    assert priors['unknown'] == 0.0
+
+
+def test_event_stream_keeps_workers_consistent():
+    fakeredis = pytest.importorskip('fakeredis')
+    client = fakeredis.FakeRedis()
+    now = time.time()
+
+    publisher = PopularityEventStream(client)
+    publisher.publish([
+        {'project_id': 'a', 'event': 'view', 'timestamp': now},
+        {'project_id': 'b', 'event': 'join', 'timestamp': now},
+    ])
+
+    worker1, worker2 = PopularityEngine(), PopularityEngine()
+    assert PopularityEventStream(client).consume(worker1) == 2
+
+    stream2 = PopularityEventStream(client, batch_size=1)
+    assert stream2.consume(worker2) == 2
+    assert stream2.consume(worker2) == 0
+
+    for ranking in (worker1.top(2, now=now), worker2.top(2, now=now)):
+        assert [project_id for project_id, _ in ranking] == ['b', 'a']
+        assert [score for _, score in ranking] == pytest.approx([5.0, 1.0])
+
+
+def test_discarded_project_leaves_ranking():
+    engine = PopularityEngine(capacity=10, top_size=3)
+    for project_id, event in (('a', 'join'), ('b', 'follow'), ('c', 'view'), ('d', 'view'), ('d', 'view')):
+        engine.record(project_id, event=event)
+
+    assert [project_id for project_id, _ in engine.top(None)] == ['a', 'b', 'd']
+
+    engine.discard('a')
+
+    # 'c' ficou fora do ranking limitado, mas volta a ocupar a vaga
+    assert [project_id for project_id, _ in engine.top(None)] == ['b', 'd', 'c']
+    assert engine.score('a') == 0.0
+
+
+def test_background_consumer_applies_published_events():
+    fakeredis = pytest.importorskip('fakeredis')
+    client = fakeredis.FakeRedis()
+    engine = PopularityEngine()
+    stream = PopularityEventStream(client, block_ms=50)
+    stream.start(engine)
+
+    try:
+        stream.publish([{'project_id': 'a', 'event': 'join', 'timestamp': time.time()}])
+        deadline = time.monotonic() + 5
+        while not engine.top(1) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        stream.stop()
+
+    assert [project_id for project_id, _ in engine.top(1)] == ['a']
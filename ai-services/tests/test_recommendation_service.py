@@ -0,0 +1,332 @@
+import threading
+import time
+
+import pytest
+from bson import ObjectId
+
+from services.recommendation_service import RecommendationService
+from services.snapshot_store import SnapshotDatabase, SnapshotStore
+
+
+USERS = [
+    {'_id': 'a', 'name': 'Ana', 'role': 'student', 'bio': '', 'interests': ['ai'], 'skills': ['python']},
+    {'_id': 'b', 'name': 'Bruno', 'role': 'student', 'bio': 'Pesquisa em IA', 'interests': ['ai'], 'skills': ['python']},
+    {'_id': 'c', 'name': 'Carla', 'role': 'professor', 'bio': '', 'interests': ['ai', 'web'], 'skills': ['react']},
+    {'_id': 'd', 'name': 'Davi', 'role': 'student', 'bio': '', 'interests': ['web'], 'skills': ['react']},
+]
+
+PROJECTS = [
+    {'_id': 'p1', 'title': 'Visão computacional', 'description': 'Deep learning para imagens médicas',
+     'visibility': 'public', 'members': [{'user': 'a'}, {'user': 'b'}], 'laboratory': 'lab1'},
+    {'_id': 'p2', 'title': 'Chatbot acadêmico', 'description': 'Processamento de linguagem natural',
+     'visibility': 'public', 'members': [{'user': 'b'}, {'user': 'c'}]},
+    {'_id': 'p3', 'title': 'Portal web', 'description': 'Aplicação react para eventos do centro',
+     'visibility': 'public', 'members': [{'user': 'd'}], 'laboratory': 'lab1'},
+    {'_id': 'p4', 'title': 'Projeto interno', 'description': 'Projeto privado do laboratório',
+     'visibility': 'private', 'members': [{'user': 'a'}, {'user': 'd'}]},
+]
+
+
+class CountingDatabase(SnapshotDatabase):
+    def __init__(self, users, projects):
+        super().__init__(users, projects)
+        self.calls = []
+
+    def get_user_by_id(self, user_id):
+        self.calls.append('get_user_by_id')
+        return super().get_user_by_id(user_id)
+
+    def get_users(self, filters=None):
+        self.calls.append('get_users')
+        return super().get_users(filters)
+
+
+@pytest.fixture
+def database():
+    return CountingDatabase(USERS, PROJECTS)
+
+
+@pytest.fixture
+def mongo_database():
+    """
+    Mesmos dados servidos por mongomock com _id ObjectId, como no MongoDB real:
+    filtros com IDs em string não encontram nada
+    """
+    mongomock = pytest.importorskip('mongomock')
+    ids = {document['_id']: ObjectId() for document in USERS + PROJECTS}
+
+    class MongoDatabase:
+        def __init__(self):
+            self.db = mongomock.MongoClient().db
+            self.db.users.insert_many([dict(user, _id=ids[user['_id']]) for user in USERS])
+            self.db.projects.insert_many([
+                dict(project, _id=ids[project['_id']],
+                     members=[{'user': ids[m['user']]} for m in project.get('members', [])])
+                for project in PROJECTS
+            ])
+
+        def get_user_by_id(self, user_id):
+            return self.db.users.find_one({'_id': ObjectId(user_id)})
+
+        def get_all_users(self):
+            return list(self.db.users.find())
+
+        def get_users(self, filters=None):
+            return list(self.db.users.find(filters or {}))
+
+        def get_all_projects(self, filters=None):
+            return list(self.db.projects.find(filters or {}))
+
+        def get_projects(self, filters=None):
+            return list(self.db.projects.find(filters or {}))
+
+        def get_user_projects(self, user_id):
+            return list(self.db.projects.find({'members.user': ObjectId(user_id)}))
+
+    return MongoDatabase(), {key: str(value) for key, value in ids.items()}
+
+
+def test_unknown_featurizer_is_rejected():
+    with pytest.raises(ValueError):
+        RecommendationService(database_connection=None, featurizer='bag_of_words')
+
+
+def test_graph_user_recommendations_fetch_candidates_in_one_query(database):
+    service = RecommendationService(database)
+
+    recommendations = service.get_user_recommendations('a', algorithm='graph')
+
+    assert [rec['user_id'] for rec in recommendations][0] == 'b'
+    assert database.calls.count('get_users') == 1
+    assert 'get_user_by_id' not in database.calls
+
+
+def test_graph_user_recommendations_match_object_ids(mongo_database):
+    database, ids = mongo_database
+    service = RecommendationService(database)
+
+    recommendations = service.get_user_recommendations(ids['a'], algorithm='graph')
+
+    assert [rec['user_id'] for rec in recommendations][0] == ids['b']
+
+
+def test_graph_user_recommendations_apply_role_filter(database):
+    service = RecommendationService(database)
+
+    recommendations = service.get_user_recommendations('a', algorithm='graph', filters={'role': 'professor'})
+
+    assert [rec['user_id'] for rec in recommendations] == ['c']
+
+
+def test_graph_ignores_private_projects(database):
+    service = RecommendationService(database)
+
+    users = [rec['user_id'] for rec in service.get_user_recommendations('a', algorithm='graph')]
+    projects = [rec['project_id'] for rec in service.get_project_recommendations('a', algorithm='graph')]
+
+    # 'd' só se conecta a 'a' pelo projeto privado p4, que não entra no grafo
+    assert service.collaboration_graph.project_node('p4') not in service.collaboration_graph.adjacency
+    assert 'p4' not in projects
+    assert 'p2' in projects and 'p3' in projects
+    assert users.index('b') < users.index('d')
+
+
+def test_stale_graph_is_refreshed_in_background(database):
+    service = RecommendationService(database)
+    service.get_project_recommendations('a', algorithm='graph')
+
+    release = threading.Event()
+    original = database.get_all_projects
+
+    def slow_get_all_projects(filters=None):
+        release.wait(5)
+        return original(filters)
+
+    database.get_all_projects = slow_get_all_projects
+    service._graph_refreshed_at -= service.GRAPH_REFRESH_SECONDS + 1
+
+    started = time.monotonic()
+    recommendations = service.get_project_recommendations('a', algorithm='graph')
+    assert time.monotonic() - started < 1
+    assert recommendations
+
+    release.set()
+    with service._graph_refresh_lock:
+        pass
+    assert time.monotonic() - service._graph_refreshed_at < 5
+
+
+def test_duplicate_index_follows_edits_and_deletions():
+    text = 'Plataforma de recomendação de projetos acadêmicos usando aprendizado de máquina'
+    projects = [
+        {'_id': 'a', 'title': 'Recomendador', 'description': text, 'visibility': 'public'},
+        {'_id': 'b', 'title': 'Recomendador', 'description': text, 'visibility': 'public'},
+        {'_id': 'c', 'title': 'Recomendador', 'description': text, 'visibility': 'public'},
+    ]
+    database = SnapshotDatabase(USERS, projects)
+    service = RecommendationService(database)
+
+    assert service.get_duplicate_project_clusters()[0]['size'] == 3
+
+    # 'b' removido, 'a' reescrito e 'c' tornado privado
+    service.refresh_duplicate_index([
+        {'_id': 'a', 'title': 'Robótica', 'description': 'Robótica educacional com sensores', 'visibility': 'public'},
+        {'_id': 'c', 'title': 'Recomendador', 'description': text, 'visibility': 'private'},
+    ])
+
+    assert service.get_duplicate_project_clusters() == []
+    assert service.duplicate_detector.project_ids() == {'a'}
+
+
+def test_duplicate_cluster_titles_match_object_ids(mongo_database):
+    database, ids = mongo_database
+    copy_id = ObjectId()
+    database.db.projects.insert_one(dict(PROJECTS[0], _id=copy_id, members=[]))
+    service = RecommendationService(database)
+
+    clusters = service.get_duplicate_project_clusters()
+
+    assert [project['project_id'] for project in clusters[0]['projects']] == [ids['p1'], str(copy_id)]
+    assert [project['title'] for project in clusters[0]['projects']] == [PROJECTS[0]['title']] * 2
+
+
+def test_single_view_does_not_outweigh_algorithm_score():
+    # p2 compartilha um membro com o projeto de 'a'; p3 só é alcançado por um
+    # laboratório com muitos projetos, então seu score PPR é bem menor
+    projects = [
+        {'_id': 'p1', 'title': 'P1', 'description': 'x', 'visibility': 'public',
+         'members': [{'user': 'a'}, {'user': 'b'}], 'laboratory': 'lab1'},
+        {'_id': 'p2', 'title': 'P2', 'description': 'x', 'visibility': 'public',
+         'members': [{'user': 'b'}]},
+        {'_id': 'p3', 'title': 'P3', 'description': 'x', 'visibility': 'public',
+         'members': [{'user': 'd'}], 'laboratory': 'lab1'},
+    ] + [
+        {'_id': f"lab{i}", 'title': 'L', 'description': 'x', 'visibility': 'public',
+         'members': [{'user': f"u{i}"}], 'laboratory': 'lab1'}
+        for i in range(10)
+    ]
+    service = RecommendationService(SnapshotDatabase(USERS, projects))
+    baseline = service.get_project_recommendations('a', limit=50, algorithm='graph')
+    scores = {rec['project_id']: rec['similarity_score'] for rec in baseline}
+    assert scores['p2'] > 2 * scores['p3']
+
+    service.record_project_events([{'project_id': 'p3', 'event': 'view'}])
+    ranked = {
+        rec['project_id']: rec
+        for rec in service.get_project_recommendations('a', limit=50, algorithm='graph')
+    }
+
+    assert ranked['p3']['popularity_score'] == pytest.approx(1.0)
+    assert ranked['p2']['ranking_score'] > ranked['p3']['ranking_score']
+
+
+def test_popularity_is_seeded_from_project_views():
+    projects = [dict(project, views=views) for project, views in zip(PROJECTS, (5, 50, 0, 500))]
+    service = RecommendationService(SnapshotDatabase(USERS, projects))
+
+    trending = service.get_trending_projects(limit=5)
+
+    # p4 é privado: contabilizado, mas não exibido
+    assert [project['project_id'] for project in trending] == ['p2', 'p1']
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_events_are_shared_between_workers_through_redis(database):
+    fakeredis = pytest.importorskip('fakeredis')
+    client = fakeredis.FakeRedis()
+    worker1 = RecommendationService(database, redis_client=client)
+    worker2 = RecommendationService(database, redis_client=client)
+
+    worker1.record_project_events([
+        {'project_id': 'p3', 'event': 'join'},
+        {'project_id': 'p1', 'event': 'view', 'timestamp': time.time() * 1000},
+    ])
+
+    try:
+        for worker in (worker1, worker2):
+            assert wait_for(lambda: [
+                project['project_id'] for project in worker.get_trending_projects()
+            ] == ['p3', 'p1'])
+    finally:
+        worker1.popularity_stream.stop()
+        worker2.popularity_stream.stop()
+
+
+def test_requests_do_not_read_redis(database):
+    fakeredis = pytest.importorskip('fakeredis')
+    request_thread = threading.current_thread()
+    reads = []
+
+    class RecordingRedis(fakeredis.FakeRedis):
+        def xread(self, *args, **kwargs):
+            reads.append(threading.current_thread())
+            return super().xread(*args, **kwargs)
+
+    service = RecommendationService(database, redis_client=RecordingRedis())
+    try:
+        service.get_trending_projects()
+        service.get_project_recommendations('a', algorithm='graph')
+        assert wait_for(lambda: reads)
+    finally:
+        service.popularity_stream.stop()
+
+    assert request_thread not in reads
+
+
+def test_events_for_private_projects_are_ignored(database):
+    service = RecommendationService(database)
+
+    recorded = service.record_project_events([
+        {'project_id': 'p4', 'event': 'join'},
+        {'project_id': 'missing', 'event': 'join'},
+        {'project_id': 'p2', 'event': 'view'},
+    ])
+
+    assert recorded == 1
+    assert service.popularity_engine.score('p4') == 0.0
+
+
+def test_trending_fills_limit_when_projects_become_private():
+    projects = [dict(project, visibility='public') for project in PROJECTS]
+    database = SnapshotDatabase(USERS, projects)
+    service = RecommendationService(database)
+    service.record_project_events([
+        {'project_id': project_id, 'event': event}
+        for project_id, event in (('p1', 'join'), ('p1', 'join'), ('p2', 'join'), ('p3', 'follow'))
+    ])
+
+    database.projects['p1']['visibility'] = 'private'
+    trending = service.get_trending_projects(limit=2)
+
+    assert [project['project_id'] for project in trending] == ['p2', 'p3']
+    assert len(service.get_trending_projects(limit=500)) == 2
+
+
+def test_trending_matches_object_ids(mongo_database):
+    database, ids = mongo_database
+    service = RecommendationService(database)
+
+    assert service.record_project_events([{'project_id': ids['p2'], 'event': 'join'}]) == 1
+    assert [project['project_id'] for project in service.get_trending_projects()] == [ids['p2']]
+
+
+def test_recommendations_from_exported_snapshot(tmp_path):
+    # Usuário sem os campos bio e skills no documento original
+    users = USERS + [{'_id': 'e', 'name': 'Eva', 'role': 'student', 'interests': ['ai']}]
+    SnapshotStore(str(tmp_path)).export(users, PROJECTS)
+    service = RecommendationService(SnapshotDatabase.load(str(tmp_path)))
+
+    # Usuários com bio vazia ou ausente devem ser recomendados normalmente
+    for algorithm in ('content_based', 'graph'):
+        recommendations = service.get_user_recommendations('b', algorithm=algorithm)
+        assert 'a' in [rec['user_id'] for rec in recommendations]
+    assert 'e' in [rec['user_id'] for rec in service.get_user_recommendations('b', algorithm='content_based')]
+
+    projects = [rec['project_id'] for rec in service.get_project_recommendations('a', algorithm='graph')]
+    assert 'p2' in projects and 'p4' not in projects
@@ -0,0 +1,151 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.snapshot_store import (
+    SnapshotDatabase, SnapshotStore, export_delta_from_database, export_from_database
+)
+
+
+CREATED = datetime(2024, 3, 1, 12, 30)
+
+USERS = [
+    {'_id': 'u1', 'name': 'Ana', 'role': 'student', 'bio': '', 'interests': ['ai', 'web'],
+     'skills': [], 'createdAt': CREATED},
+    {'_id': 'u2', 'name': 'Bruno', 'role': 'professor', 'bio': None, 'interests': [],
+     'skills': ['python'], 'createdAt': CREATED},
+]
+
+PROJECTS = [
+    {'_id': 'p1', 'title': 'Chatbot', 'description': '', 'visibility': 'public',
+     'laboratory': None, 'academicLeague': 'liga-ia', 'tags': ['nlp'], 'views': 7,
+     'members': [{'user': 'u1', 'role': 'leader'}, {'user': 'u2', 'role': 'advisor'}],
+     'technologies': [{'name': 'python', 'category': None}], 'createdAt': CREATED},
+    {'_id': 'p2', 'title': 'Portal', 'description': 'Eventos', 'visibility': 'private',
+     'laboratory': 'lab1', 'tags': [], 'views': 0, 'members': [], 'createdAt': CREATED},
+]
+
+
+def test_round_trip_preserves_empty_strings_and_nulls(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.export(USERS, PROJECTS)
+
+    db = SnapshotDatabase.load(str(tmp_path))
+    u1, u2 = db.get_user_by_id('u1'), db.get_user_by_id('u2')
+    p1 = db.get_projects({'_id': 'p1'})[0]
+
+    assert u1['bio'] == '' and u2['bio'] is None
+    assert u1['interests'] == ['ai', 'web'] and u1['skills'] == []
+    assert u1['created_at'] == CREATED
+    assert p1['description'] == '' and p1['laboratory'] is None
+    assert p1['academicLeague'] == 'liga-ia' and p1['views'] == 7
+    assert [(m['user'], m['role']) for m in p1['members']] == [('u1', 'leader'), ('u2', 'advisor')]
+    assert p1['technologies'] == [{'name': 'python', 'category': None}]
+
+
+def test_absent_fields_stay_absent(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.export(USERS + [{'_id': 'u3', 'name': 'Carla', 'interests': ['ai']}], PROJECTS)
+
+    db = SnapshotDatabase.load(str(tmp_path))
+    u3, p2 = db.get_user_by_id('u3'), db.get_projects({'_id': 'p2'})[0]
+
+    assert 'bio' not in u3 and 'skills' not in u3
+    assert u3.get('bio', '')[:150] == ''
+    assert 'academicLeague' not in p2 and 'laboratory' in p2
+    assert db.get_user_by_id('u2')['bio'] is None
+
+
+def test_deltas_apply_upserts_and_deletions(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.export(USERS, PROJECTS)
+
+    edited = dict(PROJECTS[0], title='Chatbot acadêmico', members=[{'user': 'u1', 'role': 'leader'}])
+    new = {'_id': 'p3', 'title': 'Robótica', 'visibility': 'public', 'members': [{'user': 'u1'}]}
+    store.export_delta([], [edited, new], deleted_project_ids=['p2'])
+    store.export_delta([], [], deleted_user_ids=['u2'])
+
+    db = SnapshotDatabase.load(str(tmp_path))
+
+    assert {p['_id'] for p in db.get_all_projects()} == {'p1', 'p3'}
+    assert db.get_projects({'_id': 'p1'})[0]['title'] == 'Chatbot acadêmico'
+    assert [m['user'] for m in db.get_projects({'_id': 'p1'})[0]['members']] == ['u1']
+    assert db.get_user_by_id('u2') is None
+    assert store.current_ids() == ({'u1'}, {'p1', 'p3'})
+
+
+def test_export_keeps_replaced_data_during_retention(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    first = store.export(USERS, PROJECTS)
+    delta = store.export_delta([], [], deleted_project_ids=['p2'])['deltas'][0]['name']
+
+    second = store.export(USERS[:1], PROJECTS[:1])
+
+    # Leitores que ainda leem o manifesto anterior continuam encontrando os dados
+    assert second['base']['name'] != first['base']['name']
+    assert {first['base']['name'], delta, second['base']['name']} <= set(os.listdir(tmp_path))
+    assert [u['_id'] for u in SnapshotDatabase.load(str(tmp_path)).get_all_users()] == ['u1']
+
+    # Encerrada a retenção, a próxima escrita apaga os dados substituídos
+    store.retention_seconds = 0
+    third = store.export(USERS, PROJECTS)
+    data = {entry for entry in os.listdir(tmp_path) if entry.startswith(('base-', 'delta-'))}
+    assert data == {third['base']['name']}
+
+
+def test_concurrent_deltas_are_not_lost(tmp_path):
+    SnapshotStore(str(tmp_path)).export(USERS, PROJECTS)
+    barrier = threading.Barrier(8)
+
+    def export_delta(index):
+        barrier.wait()
+        SnapshotStore(str(tmp_path)).export_delta(
+            [], [{'_id': f"n{index}", 'title': f"Projeto {index}", 'visibility': 'public'}]
+        )
+
+    threads = [threading.Thread(target=export_delta, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    store = SnapshotStore(str(tmp_path))
+    assert len(store.read_manifest()['deltas']) == 8
+    assert store.current_ids()[1] == {'p1', 'p2'} | {f"n{index}" for index in range(8)}
+
+
+def test_delta_from_database_reads_only_changed_documents(tmp_path):
+    mongomock = pytest.importorskip('mongomock')
+    database = mongomock.MongoClient().db
+    database.users.insert_many([dict(user, updatedAt=CREATED) for user in USERS])
+    database.projects.insert_many([dict(project, updatedAt=CREATED) for project in PROJECTS])
+
+    store = SnapshotStore(str(tmp_path))
+    manifest = export_from_database(store, database)
+    snapshot_time = datetime.fromisoformat(manifest['snapshot_time'])
+
+    later = snapshot_time + timedelta(minutes=5)
+    database.projects.update_one({'_id': 'p1'}, {'$set': {'title': 'Chatbot v2', 'updatedAt': later}})
+    database.projects.insert_one({'_id': 'p3', 'title': 'Robótica', 'visibility': 'public', 'members': []})
+    database.projects.delete_one({'_id': 'p2'})
+    database.users.delete_one({'_id': 'u2'})
+
+    queries = []
+    find = database.projects.find
+    database.projects.find = lambda *args, **kwargs: queries.append(args) or find(*args, **kwargs)
+    manifest = export_delta_from_database(store, database)
+
+    # Documentos completos só para os alterados; remoções vêm de uma projeção de _id
+    assert queries[0][0]['$or'][0]['updatedAt']['$gte'] <= snapshot_time
+    assert queries[1] == ({}, {'_id': 1})
+
+    delta = manifest['deltas'][0]['tables']
+    assert delta['users']['rows'] == 0
+    assert delta['projects']['rows'] == 2
+    assert datetime.fromisoformat(manifest['snapshot_time']) >= snapshot_time
+
+    db = SnapshotDatabase.load(str(tmp_path))
+    assert {u['_id'] for u in db.get_all_users()} == {'u1'}
+    assert {p['_id']: p['title'] for p in db.get_all_projects()} == {'p1': 'Chatbot v2', 'p3': 'Robótica'}